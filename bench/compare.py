@@ -0,0 +1,101 @@
+"""Compare two benchmark result files and flag regressions.
+
+Runs are matched by target corpus size. A metric counts as a regression when
+it is slower or larger than the baseline by more than --threshold. Exits with
+status 1 if any metric regressed, so it can gate CI.
+
+Usage:
+    python bench/compare.py bench/results/<baseline>.json bench/results/<candidate>.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# (label, path into a run); every metric is lower-is-better
+METRICS = [
+    ("chunking seconds", ("chunking", "chunk_seconds")),
+    ("vector index build seconds", ("index_build", "vector_seconds")),
+    ("bm25 build seconds", ("index_build", "bm25_seconds")),
+    ("index disk MB", ("index_build", "disk_mb")),
+    ("streaming ingest seconds", ("streaming_ingest", "seconds")),
+    ("dense p50 ms", ("retrieval", "dense", "p50_ms")),
+    ("dense p99 ms", ("retrieval", "dense", "p99_ms")),
+    ("lexical p50 ms", ("retrieval", "lexical", "p50_ms")),
+    ("lexical p99 ms", ("retrieval", "lexical", "p99_ms")),
+    ("hybrid p50 ms", ("retrieval", "hybrid", "p50_ms")),
+    ("hybrid p99 ms", ("retrieval", "hybrid", "p99_ms")),
+    ("dense bulk ms/query", ("retrieval", "dense", "bulk_ms_per_query")),
+    ("prompt assembly p50 ms", ("prompt_assembly", "p50_ms")),
+    ("end to end p95 ms", ("end_to_end", "p95_ms")),
+    ("peak RSS MB", ("memory", "peak_rss_mb")),
+]
+
+
+def lookup(run: dict, path: tuple[str, ...]) -> float | None:
+    value = run
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def load_runs(path: Path) -> tuple[dict, dict[int, dict]]:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    return report["meta"], {run["n_chunks_target"]: run for run in report["runs"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", type=Path, help="Baseline results (.json)")
+    parser.add_argument("candidate", type=Path, help="Candidate results (.json)")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown counted as a regression (default: 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    base_meta, base_runs = load_runs(args.baseline)
+    cand_meta, cand_runs = load_runs(args.candidate)
+    console.print(f"\n[bold]Baseline[/bold] {base_meta['commit']} ({base_meta['timestamp']})")
+    console.print(f"[bold]Candidate[/bold] {cand_meta['commit']} ({cand_meta['timestamp']})\n")
+
+    regressions = 0
+    for size in sorted(set(base_runs) & set(cand_runs)):
+        table = Table(title=f"~{size} chunks")
+        table.add_column("Metric", style="bold")
+        table.add_column("Baseline", justify="right")
+        table.add_column("Candidate", justify="right")
+        table.add_column("Change", justify="right")
+        for label, path in METRICS:
+            before, after = lookup(base_runs[size], path), lookup(cand_runs[size], path)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            if change > args.threshold:
+                regressions += 1
+                style = "red"
+            elif change < -args.threshold:
+                style = "green"
+            else:
+                style = "dim"
+            table.add_row(label, f"{before:g}", f"{after:g}", f"[{style}]{change:+.1%}[/{style}]")
+        console.print(table)
+
+    missing = set(base_runs) ^ set(cand_runs)
+    if missing:
+        console.print(f"[yellow]Sizes only in one file (not compared): {sorted(missing)}[/yellow]")
+
+    if regressions:
+        console.print(f"\n[red]{regressions} metrics regressed by more than {args.threshold:.0%}[/red]")
+        sys.exit(1)
+    console.print(f"\n[green]No regressions above {args.threshold:.0%}[/green]")
+
+
+if __name__ == "__main__":
+    main()
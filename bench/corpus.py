@@ -0,0 +1,87 @@
+"""Deterministic synthetic paper corpus for benchmarks.
+
+Writes markdown files that look like the paper source: H2 and H3 sections made
+of paragraphs drawn from the paper's vocabulary. Each size and seed always
+gives the same corpus. Its total length is chosen so that chunking with the
+given chunk size and overlap produces roughly the requested number of chunks.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+VOCABULARY = """
+love entropy syntropy sentience coordination decentralization transparency verifiability voluntarism
+exit rights realms governance contract smart social flourishing power pluralism deployment trust
+consent community treasury vote proposal citizen extension registry ledger audit accountability
+mutual aid cooperation adversary hatred compassion dignity autonomy sovereignty institution market
+incentive resource energy survival universe complexity information signal network protocol consensus
+the of and to in a is that for it as with be on by this are from or an which can their more not
+we they all these has have was will would its our about into when there than also such how only
+each between through must most other because both while those over where what without across within
+""".split()
+
+SECTION_TITLES = [
+    "Foundations", "Entropy and Sentience", "The Central Discovery", "Syntropy", "Smart Social Contracts",
+    "Realms GOS", "Exit Rights", "Transparency", "Power Analysis", "The Love Ethic", "Deployment",
+    "Economic Independence", "Pluralism", "Governance Design",
+]
+
+CHUNKS_PER_FILE = 200
+# The splitter breaks at paragraph and sentence boundaries, so chunks average ~89% of chunk_size
+CHUNK_FILL = 0.89
+
+
+def _paragraph(rng: np.random.Generator, weights: np.ndarray) -> str:
+    sentences = []
+    for _ in range(rng.integers(3, 7)):
+        words = [VOCABULARY[i] for i in rng.choice(len(VOCABULARY), size=rng.integers(8, 21), p=weights)]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def generate_corpus(path: Path, n_chunks: int, chunk_size: int = 1000, chunk_overlap: int = 200,
+                    seed: int = 0) -> dict:
+    """Write a synthetic corpus of about n_chunks chunks under path.
+
+    Returns the number of files and characters written.
+    """
+    rng = np.random.default_rng(seed)
+    # Zipf-like word frequencies, so BM25 sees realistic term statistics
+    weights = 1.0 / np.arange(1, len(VOCABULARY) + 1)
+    weights = weights[rng.permutation(len(VOCABULARY))]
+    weights /= weights.sum()
+
+    target_chars = n_chunks * max(int(chunk_size * CHUNK_FILL) - chunk_overlap, 1)
+    n_files = max(1, -(-n_chunks // CHUNKS_PER_FILE))
+    chars_per_file = target_chars // n_files
+
+    path.mkdir(parents=True, exist_ok=True)
+    total_chars = 0
+    for f in range(n_files):
+        parts = [f"# Part {f + 1}\n"]
+        size = len(parts[0])
+        section = 0
+        while size < chars_per_file:
+            title = SECTION_TITLES[(f + section) % len(SECTION_TITLES)]
+            heading = f"\n## {title} {section + 1}\n" if section % 3 == 0 else f"\n### {title}\n"
+            parts.append(heading)
+            size += len(heading)
+            for _ in range(rng.integers(2, 5)):
+                paragraph = "\n" + _paragraph(rng, weights) + "\n"
+                parts.append(paragraph)
+                size += len(paragraph)
+            section += 1
+
+        chapter = path / f"chapter_{f // 50:03d}"
+        chapter.mkdir(exist_ok=True)
+        (chapter / f"part_{f:05d}.md").write_text("".join(parts), encoding="utf-8")
+        total_chars += size
+
+    return {"files": n_files, "chars": total_chars}
+
+
+def sample_queries(n: int, seed: int = 1) -> list[str]:
+    """Short keyword queries over the corpus vocabulary."""
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(VOCABULARY[:60], size=rng.integers(2, 7))) for _ in range(n)]
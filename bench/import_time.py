@@ -0,0 +1,108 @@
+"""Check CLI cold-start cost with ``python -X importtime``.
+
+Runs every entry point with --help, which exits right after argument parsing,
+so all it measures is module-level imports. Fails if an entry point's total
+import time exceeds --budget-ms, or if it imports a heavy dependency that
+should only load on the code path that uses it (LLM SDKs, langchain, Chroma,
+Rich's markdown renderer).
+
+Usage:
+    python bench/import_time.py
+    python bench/import_time.py --budget-ms 300 --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+REPO_ROOT = Path(__file__).parent.parent
+ENTRY_POINTS = [
+    "rag/pipeline.py",
+    "rag/ingest.py",
+    "rag/server.py",
+    "eval/evaluate.py",
+    "eval/prescreen.py",
+    "eval/report.py",
+    "datasets/generate_dataset.py",
+    "datasets/dedup.py",
+    "examples/chat_with_claude.py",
+    "examples/chat_with_openai.py",
+]
+# Top-level packages (or exact modules) that must not load before argument parsing
+HEAVY_MODULES = ["anthropic", "openai", "langchain", "langchain_core", "langchain_community", "langchain_openai",
+                 "langchain_text_splitters", "chromadb", "rich.markdown"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def import_profile(script: str, runs: int) -> tuple[float, dict[str, float]]:
+    """Import time of `script --help` in ms, and cumulative ms per module, from the fastest of `runs` runs."""
+    best_total, best_modules = None, {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", script, "--help"],
+                                cwd=REPO_ROOT, capture_output=True, text=True,
+                                env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} --help failed:\n{result.stderr[-2000:]}")
+
+        total, modules = 0.0, {}
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            cumulative_ms = int(match.group(2)) / 1000
+            modules[match.group(4)] = cumulative_ms
+            if len(match.group(3)) == 1:  # top-level import
+                total += cumulative_ms
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+    return best_total, best_modules
+
+
+def heavy_imports(modules: dict[str, float]) -> list[str]:
+    """Entries of HEAVY_MODULES that were imported."""
+    return [heavy for heavy in HEAVY_MODULES
+            if any(name == heavy or name.startswith(heavy + ".") for name in modules)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI import time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=400, help="Max import time per entry point (default: 400)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per entry point; the fastest is reported")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest modules per entry point")
+    parser.add_argument("scripts", nargs="*", default=ENTRY_POINTS, help="Entry points to check")
+    args = parser.parse_args()
+
+    table = Table(title=f"Import Time (--help, budget {args.budget_ms:.0f} ms)")
+    table.add_column("Entry point", style="bold")
+    table.add_column("ms", justify="right")
+    table.add_column("Heavy imports")
+    failures = 0
+    for script in args.scripts:
+        total, modules = import_profile(script, args.runs)
+        heavy = heavy_imports(modules)
+        over = total > args.budget_ms
+        failures += over or bool(heavy)
+        table.add_row(script, f"[red]{total:.0f}[/red]" if over else f"{total:.0f}",
+                      f"[red]{', '.join(heavy)}[/red]" if heavy else "-")
+        if args.top:
+            for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+                table.add_row(f"  [dim]{name}[/dim]", f"[dim]{ms:.1f}[/dim]", "")
+    console.print(table)
+
+    if failures:
+        console.print(f"\n[red]{failures} entry points over budget or importing heavy dependencies eagerly[/red]")
+        sys.exit(1)
+    console.print("\n[green]All entry points within budget[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Benchmark ingestion, retrieval and end-to-end latency on a synthetic corpus.
+
+Runs fully offline, using deterministic stub embeddings and the stub LLM
+provider. For each corpus size, it measures:
+- chunking throughput;
+- index build time;
+- retrieval latency percentiles per retrieval mode;
+- prompt assembly time;
+- end-to-end answer latency;
+- memory use.
+
+Results are written as JSON, tagged with the git commit, so runs can be
+compared with bench/compare.py.
+
+Usage:
+    python bench/run_bench.py --chunks 1000 10000
+    python bench/compare.py bench/results/<old>.json bench/results/<new>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from corpus import generate_corpus, sample_queries
+
+console = Console()
+
+REPO_ROOT = Path(__file__).parent.parent
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+
+def configure_offline(backend: str) -> None:
+    """Point the RAG modules at stub embeddings before they read config."""
+    os.environ["EMBEDDING_PROVIDER"] = "stub"
+    os.environ["EMBEDDING_CACHE_MAX_MB"] = "0"
+    os.environ["STUB_LLM_LATENCY"] = "0"
+    os.environ["VECTOR_BACKEND"] = backend
+    sys.path.insert(0, str(REPO_ROOT / "rag"))
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def dir_size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 2 ** 20
+
+
+def latency_stats(samples: list[float]) -> dict:
+    """Latency percentiles in milliseconds."""
+    ms = np.array(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def timed(fn, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_size(n_chunks: int, args, workdir: Path) -> dict:
+    """Run every benchmark stage for one corpus size."""
+    import ingest
+    import resources
+    from bm25 import bm25_dir, write_bm25_index
+    from context_packer import pack_context
+    from pipeline import answer, build_rag_prompt
+    from retrieve import chunk_id, format_context, retrieve, retrieve_many
+
+    ingest.console.quiet = True
+    corpus_dir = workdir / f"corpus_{n_chunks}"
+    persist_dir = workdir / f"store_{n_chunks}"
+    memory = {"baseline_rss_mb": round(rss_mb(), 1)}
+
+    seconds, corpus = timed(generate_corpus, corpus_dir, n_chunks, args.chunk_size, args.chunk_overlap, args.seed)
+    console.print(f"[dim]  corpus: {corpus['files']} files, {corpus['chars'] / 1e6:.1f}M chars "
+                  f"({seconds:.1f}s)[/dim]")
+
+    # Chunking
+    load_seconds, documents = timed(ingest.load_paper_documents, corpus_dir)
+    chunk_seconds, (texts, metadatas) = timed(ingest.chunk_documents, documents, args.chunk_size, args.chunk_overlap)
+    chunking = {
+        "files": len(documents),
+        "chunks": len(texts),
+        "chars": corpus["chars"],
+        "load_seconds": round(load_seconds, 4),
+        "chunk_seconds": round(chunk_seconds, 4),
+        "chunks_per_sec": round(len(texts) / chunk_seconds, 1) if chunk_seconds else None,
+        "mb_per_sec": round(corpus["chars"] / 2 ** 20 / chunk_seconds, 2) if chunk_seconds else None,
+    }
+    memory["after_chunking_rss_mb"] = round(rss_mb(), 1)
+    console.print(f"[dim]  chunking: {len(texts)} chunks in {chunk_seconds:.2f}s[/dim]")
+
+    # Index build
+    if args.backend == "numpy":
+        vector_seconds, _ = timed(ingest.create_vector_index, texts, metadatas, persist_dir, args.ivf_lists)
+    else:
+        vector_seconds, _ = timed(ingest.create_vectorstore, texts, metadatas, persist_dir)
+    bm25_seconds, _ = timed(write_bm25_index, bm25_dir(persist_dir), [chunk_id(m) for m in metadatas],
+                            texts, metadatas)
+    index_build = {
+        "backend": args.backend,
+        "ivf_lists": args.ivf_lists if args.backend == "numpy" else None,
+        "vector_seconds": round(vector_seconds, 4),
+        "bm25_seconds": round(bm25_seconds, 4),
+        "disk_mb": round(dir_size_mb(persist_dir), 2),
+    }
+    memory["after_index_build_rss_mb"] = round(rss_mb(), 1)
+    console.print(f"[dim]  index build: vectors {vector_seconds:.2f}s, bm25 {bm25_seconds:.2f}s[/dim]")
+    del documents, texts, metadatas
+
+    # Streaming ingestion as ingest.py runs it: pooled chunking overlapped with batched embedding and writes
+    ingest_seconds, stats = timed(ingest.ingest, corpus_dir, workdir / f"stream_{n_chunks}", args.backend,
+                                  args.chunk_size, args.chunk_overlap, n_lists=args.ivf_lists)
+    streaming_ingest = {
+        "workers": ingest.INGEST_WORKERS or os.cpu_count(),
+        "batch_size": ingest.EMBEDDING_BATCH_SIZE,
+        "seconds": round(ingest_seconds, 4),
+        "chunks_per_sec": round(stats["chunks"] / ingest_seconds, 1) if ingest_seconds else None,
+    }
+    memory["after_streaming_ingest_rss_mb"] = round(rss_mb(), 1)
+    console.print(f"[dim]  streaming ingest: {stats['chunks']} chunks in {ingest_seconds:.2f}s[/dim]")
+
+    # Retrieval latency (first query per mode opens the indexes and is reported separately)
+    queries = sample_queries(args.queries, args.seed + 1)
+    retrieval = {}
+    for mode in RETRIEVAL_MODES:
+        open_seconds, _ = timed(retrieve, queries[0], args.top_k, persist_dir, args.backend, mode)
+        samples = [timed(retrieve, query, args.top_k, persist_dir, args.backend, mode)[0] for query in queries]
+        bulk_seconds, _ = timed(retrieve_many, queries, args.top_k, persist_dir, args.backend, mode)
+        retrieval[mode] = {"first_query_ms": round(open_seconds * 1000, 3), **latency_stats(samples),
+                           "bulk_ms_per_query": round(bulk_seconds * 1000 / len(queries), 3)}
+    memory["after_retrieval_rss_mb"] = round(rss_mb(), 1)
+    console.print("[dim]  retrieval p95: " + ", ".join(
+        f"{mode} {stats['p95_ms']:.2f}ms" for mode, stats in retrieval.items()) + "[/dim]")
+
+    # Prompt assembly: packing, formatting and message construction for retrieved results
+    system_prompt = (REPO_ROOT / "prompts" / "system_prompt.md").read_text(encoding="utf-8")
+    retrieved = retrieve_many(queries, args.top_k, persist_dir, args.backend)
+    samples = []
+    for query, results in zip(queries, retrieved):
+        start = time.perf_counter()
+        packed, _ = pack_context(results, args.context_tokens)
+        build_rag_prompt(query, format_context(packed), system_prompt)
+        samples.append(time.perf_counter() - start)
+    prompt_assembly = latency_stats(samples)
+
+    # End to end through the pipeline with the stub LLM (no response cache)
+    samples = [timed(answer, query, system_prompt, "stub", args.top_k, None, args.context_tokens,
+                     persist_dir=persist_dir)[0] for query in queries]
+    end_to_end = latency_stats(samples)
+    console.print(f"[dim]  end to end p95: {end_to_end['p95_ms']:.2f}ms[/dim]")
+
+    memory["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    resources.close()
+    if not args.keep:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+        shutil.rmtree(persist_dir, ignore_errors=True)
+        shutil.rmtree(workdir / f"stream_{n_chunks}", ignore_errors=True)
+
+    return {
+        "n_chunks_target": n_chunks,
+        "chunking": chunking,
+        "index_build": index_build,
+        "streaming_ingest": streaming_ingest,
+        "retrieval": retrieval,
+        "prompt_assembly": prompt_assembly,
+        "end_to_end": end_to_end,
+        "memory": memory,
+    }
+
+
+def print_summary(runs: list[dict]) -> None:
+    table = Table(title="Benchmark Summary")
+    table.add_column("Chunks", justify="right")
+    table.add_column("Chunk/s", justify="right")
+    table.add_column("Index build", justify="right")
+    table.add_column("Ingest", justify="right")
+    for mode in RETRIEVAL_MODES:
+        table.add_column(f"{mode} p50/p99 ms", justify="right")
+    table.add_column("Prompt p50 ms", justify="right")
+    table.add_column("E2E p95 ms", justify="right")
+    table.add_column("Peak RSS MB", justify="right")
+    for run in runs:
+        build = run["index_build"]
+        table.add_row(
+            str(run["chunking"]["chunks"]),
+            f"{run['chunking']['chunks_per_sec']:.0f}",
+            f"{build['vector_seconds'] + build['bm25_seconds']:.2f}s",
+            f"{run['streaming_ingest']['seconds']:.2f}s",
+            *[f"{run['retrieval'][mode]['p50_ms']:.2f}/{run['retrieval'][mode]['p99_ms']:.2f}"
+              for mode in RETRIEVAL_MODES],
+            f"{run['prompt_assembly']['p50_ms']:.3f}",
+            f"{run['end_to_end']['p95_ms']:.2f}",
+            f"{run['memory']['peak_rss_mb']:.0f}",
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, retrieval and end-to-end latency offline")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000],
+                        help="Corpus sizes to benchmark, in chunks (e.g. 10 1000 100000)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed per retrieval mode")
+    parser.add_argument("--top-k", type=int, default=5, help="Chunks retrieved per query")
+    parser.add_argument("--context-tokens", type=int, default=4000, help="Context token budget for prompt assembly")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size for splitting")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="Chunk overlap for splitting")
+    parser.add_argument("--backend", choices=["numpy", "chroma"], default="numpy", help="Vector backend to build")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF clusters for the numpy backend (0 = exact)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and query seed")
+    parser.add_argument("--workdir", type=Path, default=None, help="Scratch directory (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep generated corpora and indexes")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="JSON results file (default: bench/results/<commit>-<timestamp>.json)")
+    args = parser.parse_args()
+
+    configure_offline(args.backend)
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    output = args.output or REPO_ROOT / "bench" / "results" / f"{commit}-{started:%Y%m%dT%H%M%SZ}.json"
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    console.print("\n[bold]Governance AI — Benchmarks[/bold]\n")
+    runs = []
+    try:
+        for n_chunks in args.chunks:
+            console.print(f"[blue]Benchmarking ~{n_chunks} chunks...[/blue]")
+            runs.append(bench_size(n_chunks, args, workdir))
+    finally:
+        if args.workdir is None and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        },
+        "runs": runs,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    console.print()
+    print_summary(runs)
+    console.print(f"\n[green]Results saved to {output}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Remove near-duplicate records from JSONL datasets.
+
+Each record's text (question and answer by default) is lowercased, split into
+words and shingled into overlapping word n-grams. A MinHash signature of the
+shingles estimates Jaccard similarity between records, and locality-sensitive
+hashing (LSH) over bands of the signature finds candidate pairs by sorting
+instead of comparing every pair, so the cost grows as n log n. Candidates
+whose estimated Jaccard similarity reaches --threshold are duplicates;
+with --embeddings they must also reach --cosine similarity between their
+embeddings.
+
+Input files are streamed twice, once to compute signatures and once to write
+the kept records, so only signatures and ids are held in memory. The first
+record of each duplicate cluster, in input order, is kept; list the seed
+dataset first so seed pairs win over generated ones.
+
+Usage:
+    python datasets/dedup.py datasets/seed/qa_pairs.jsonl datasets/generated/qa_pairs_generated.jsonl \\
+        --output datasets/generated/qa_pairs_dedup.jsonl
+    python datasets/dedup.py seed.jsonl generated.jsonl --output out.jsonl --embeddings --cosine 0.92
+"""
+
+import argparse
+import functools
+import json
+import re
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+# Add parent directory to path for config access
+sys.path.insert(0, str(Path(__file__).parent.parent / "rag"))
+from config import EMBEDDING_BATCH_SIZE
+
+console = Console()
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 Jaccard become candidates
+SHINGLE_SIZE = 5
+THRESHOLD = 0.8
+COSINE_THRESHOLD = 0.9
+TEXT_FIELDS = ["question", "answer"]
+SIGNATURE_BATCH = 256  # records hashed per vectorized MinHash step
+
+MAX_HASH = np.uint32((1 << 32) - 1)
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+WORD = re.compile(r"\w+")
+
+
+def iter_records(paths: list[Path], warn: bool = True):
+    """Yield (file, line number, record) for every JSON object in the input files, in order."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    if warn:
+                        console.print(f"[yellow]Skipping invalid JSON at {path}:{line_no}[/yellow]")
+                    continue
+                if isinstance(record, dict):
+                    yield path, line_no, record
+
+
+def record_text(record: dict, fields: list[str]) -> str:
+    return "\n".join(str(record.get(field, "")) for field in fields)
+
+
+@functools.lru_cache(maxsize=1 << 20)
+def word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """64-bit hashes of the word n-grams of a text, one per position.
+
+    Repeated shingles are kept: they don't change a minimum, so a MinHash of
+    this list equals one of the shingle set. Texts shorter than `size` words
+    are a single shingle.
+    """
+    words = WORD.findall(text.lower())
+    hashes = np.fromiter(map(word_hash, words), dtype=np.uint64, count=len(words))
+    size = min(size, len(hashes))
+    count = len(hashes) - size + 1 if size else 0
+    shingles = hashes[:count].copy()
+    with np.errstate(over="ignore"):
+        for offset in range(1, size):
+            shingles = shingles * SHINGLE_MULTIPLIER + hashes[offset:offset + count]
+    return shingles
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift hashes ((a * x + b) >> 32), computed for many records at once."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = (rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) << np.uint64(1) | np.uint64(1))[:, None]
+        self.b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+        self.num_perm = num_perm
+
+    def signatures(self, shingle_sets: list[np.ndarray]) -> np.ndarray:
+        """One row of ``num_perm`` minimum hashes per shingle set; empty sets get all-max rows."""
+        signatures = np.full((len(shingle_sets), self.num_perm), MAX_HASH, dtype=np.uint32)
+        nonempty = [i for i, shingles in enumerate(shingle_sets) if len(shingles)]
+        if not nonempty:
+            return signatures
+        hashes = np.concatenate([shingle_sets[i] for i in nonempty])
+        starts = np.cumsum([0] + [len(shingle_sets[i]) for i in nonempty[:-1]])
+        with np.errstate(over="ignore"):
+            permuted = ((self.a * hashes + self.b) >> np.uint64(32)).astype(np.uint32)
+        signatures[nonempty] = np.minimum.reduceat(permuted, starts, axis=1).T
+        return signatures
+
+
+def compute_signatures(paths: list[Path], fields: list[str], hasher: MinHasher,
+                       shingle_size: int) -> tuple[np.ndarray, np.ndarray, list[dict]]:
+    """Stream the inputs once, returning signatures, an empty-text mask and per-record provenance."""
+    blocks, empty, records, pending = [], [], [], []
+
+    def flush() -> None:
+        blocks.append(hasher.signatures(pending))
+        empty.extend(len(shingles) == 0 for shingles in pending)
+        pending.clear()
+
+    for path, line_no, record in iter_records(paths):
+        records.append({"id": record.get("id"), "file": str(path), "line": line_no})
+        pending.append(shingle_hashes(record_text(record, fields), shingle_size))
+        if len(pending) >= SIGNATURE_BATCH:
+            flush()
+    if pending:
+        flush()
+
+    signatures = np.concatenate(blocks) if blocks else np.empty((0, hasher.num_perm), dtype=np.uint32)
+    return signatures, np.array(empty, dtype=bool), records
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int, skip: np.ndarray) -> np.ndarray:
+    """Unique (i, j) pairs, i < j, that share at least one LSH band.
+
+    Records are sorted by each band's values; every record in a bucket is
+    paired with the bucket's first record and with its predecessor, which
+    links the whole bucket with a linear number of pairs.
+    """
+    rows = signatures.shape[1] // bands
+    indices = np.flatnonzero(~skip)
+    pairs = []
+    for band in range(bands):
+        values = np.ascontiguousarray(signatures[indices, band * rows:(band + 1) * rows])
+        _, labels = np.unique(values.view(np.dtype((np.void, values.itemsize * rows))).ravel(),
+                              return_inverse=True)
+        order = np.argsort(labels, kind="stable")
+        same = labels[order][1:] == labels[order][:-1]
+        if not same.any():
+            continue
+        starts = np.flatnonzero(np.r_[True, ~same])
+        first = order[starts[np.searchsorted(starts, np.arange(len(order)), side="right") - 1]]
+        follower = np.r_[False, same]
+        pairs.append(np.stack([order[:-1][same], order[1:][same]], axis=1))
+        pairs.append(np.stack([first[follower], order[follower]], axis=1))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = indices[np.concatenate(pairs)]
+    pairs = np.sort(pairs, axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return np.unique(pairs, axis=0)
+
+
+def jaccard(signatures: np.ndarray, pairs: np.ndarray, block: int = 65536) -> np.ndarray:
+    """Estimated Jaccard similarity of each pair: the share of equal signature entries."""
+    estimates = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), block):
+        chunk = pairs[start:start + block]
+        estimates[start:start + block] = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(axis=1)
+    return estimates
+
+
+def embed_records(paths: list[Path], fields: list[str], needed: set[int]) -> dict[int, np.ndarray]:
+    """Normalized embeddings of the needed records, embedded in batches while streaming the inputs."""
+    from embedding_cache import get_embeddings
+
+    embeddings = get_embeddings()
+    vectors, batch_ids, batch_texts = {}, [], []
+
+    def flush() -> None:
+        for index, vector in zip(batch_ids, embeddings.embed_documents(batch_texts)):
+            vector = np.asarray(vector, dtype=np.float32)
+            vectors[index] = vector / (np.linalg.norm(vector) or 1.0)
+        batch_ids.clear()
+        batch_texts.clear()
+
+    for index, (_, _, record) in enumerate(iter_records(paths, warn=False)):
+        if index in needed:
+            batch_ids.append(index)
+            batch_texts.append(record_text(record, fields))
+            if len(batch_ids) >= EMBEDDING_BATCH_SIZE:
+                flush()
+    if batch_ids:
+        flush()
+    return vectors
+
+
+def clusters_from_pairs(n: int, pairs: np.ndarray) -> np.ndarray:
+    """Union-find over duplicate pairs; each record's root is the first record of its cluster."""
+    parent = np.arange(n)
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(i) for i in range(n)], dtype=np.int64)
+
+
+def write_kept(paths: list[Path], output: Path, keep: np.ndarray) -> None:
+    """Stream the inputs again and write the kept records."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        for index, (_, _, record) in enumerate(iter_records(paths, warn=False)):
+            if keep[index]:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def build_report(records: list[dict], roots: np.ndarray, signatures: np.ndarray,
+                 vectors: dict[int, np.ndarray], params: dict) -> dict:
+    """Summary counts and every duplicate cluster, largest first."""
+    members = {}
+    for index in np.flatnonzero(roots != np.arange(len(roots))):
+        members.setdefault(int(roots[index]), []).append(int(index))
+
+    clusters = []
+    for root, duplicates in members.items():
+        entries = []
+        for index in duplicates:
+            entry = {**records[index], "jaccard": round(float((signatures[root] == signatures[index]).mean()), 3)}
+            if root in vectors and index in vectors:
+                entry["cosine"] = round(float(vectors[root] @ vectors[index]), 3)
+            entries.append(entry)
+        clusters.append({"size": len(duplicates) + 1, "kept": records[root], "duplicates": entries})
+    clusters.sort(key=lambda cluster: -cluster["size"])
+
+    removed = sum(len(duplicates) for duplicates in members.values())
+    return {
+        "params": params,
+        "records": len(records),
+        "kept": len(records) - removed,
+        "removed": removed,
+        "clusters": len(clusters),
+        "duplicate_clusters": clusters,
+    }
+
+
+def dedup_files(paths: list[Path], output: Path, report_path: Path | None = None, fields: list[str] = TEXT_FIELDS,
+                threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                shingle_size: int = SHINGLE_SIZE, use_embeddings: bool = False,
+                cosine: float = COSINE_THRESHOLD) -> dict:
+    """Write the records of `paths` without near-duplicates to `output` and return the cluster report."""
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    if output.resolve() in {path.resolve() for path in paths}:
+        raise ValueError(f"Output {output} is also an input")
+
+    with console.status("Computing MinHash signatures..."):
+        signatures, empty, records = compute_signatures(paths, fields, MinHasher(num_perm), shingle_size)
+    console.print(f"[green]Hashed {len(records)} records from {len(paths)} files[/green]")
+
+    with console.status("Finding candidate pairs..."):
+        pairs = candidate_pairs(signatures, bands, empty)
+        pairs = pairs[jaccard(signatures, pairs) >= threshold]
+    console.print(f"[green]{len(pairs)} pairs at or above Jaccard {threshold}[/green]")
+
+    vectors = {}
+    if use_embeddings and len(pairs):
+        with console.status(f"Embedding {len(np.unique(pairs))} records to confirm pairs..."):
+            vectors = embed_records(paths, fields, set(np.unique(pairs).tolist()))
+            similar = np.array([vectors[i] @ vectors[j] >= cosine for i, j in pairs], dtype=bool)
+        pairs = pairs[similar]
+        console.print(f"[green]{len(pairs)} pairs confirmed at cosine {cosine}[/green]")
+
+    roots = clusters_from_pairs(len(records), pairs)
+    keep = roots == np.arange(len(records))
+    write_kept(paths, output, keep)
+
+    params = {"inputs": [str(path) for path in paths], "fields": fields, "threshold": threshold,
+              "num_perm": num_perm, "bands": bands, "shingle_size": shingle_size,
+              "cosine": cosine if use_embeddings else None}
+    report = build_report(records, roots, signatures, vectors, params)
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return report
+
+
+def print_report(report: dict, top: int = 10) -> None:
+    table = Table(title=f"Largest Duplicate Clusters (of {report['clusters']})")
+    table.add_column("Size", justify="right")
+    table.add_column("Kept")
+    table.add_column("Duplicates")
+    for cluster in report["duplicate_clusters"][:top]:
+        duplicates = ", ".join(str(entry["id"]) for entry in cluster["duplicates"][:5])
+        if len(cluster["duplicates"]) > 5:
+            duplicates += f", … (+{len(cluster['duplicates']) - 5})"
+        table.add_row(str(cluster["size"]), str(cluster["kept"]["id"]), duplicates)
+    if report["clusters"]:
+        console.print(table)
+    console.print(f"[bold green]Kept {report['kept']}/{report['records']} records, "
+                  f"removed {report['removed']} near-duplicates[/bold green]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove near-duplicate records from JSONL datasets")
+    parser.add_argument("inputs", type=Path, nargs="+", help="Input JSONL files; earlier files win ties")
+    parser.add_argument("--output", type=Path, required=True, help="Deduplicated JSONL output")
+    parser.add_argument("--report", type=Path, default=None,
+                        help="Cluster report (.json); defaults to <output>.report.json")
+    parser.add_argument("--fields", nargs="+", default=TEXT_FIELDS,
+                        help=f"Record fields compared (default: {' '.join(TEXT_FIELDS)})")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Estimated Jaccard similarity for a duplicate (default: {THRESHOLD})")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM, help="MinHash signature length")
+    parser.add_argument("--bands", type=int, default=BANDS,
+                        help="LSH bands; more bands find lower-similarity candidates")
+    parser.add_argument("--shingle-size", type=int, default=SHINGLE_SIZE, help="Words per shingle")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="Also require embedding cosine similarity for a duplicate")
+    parser.add_argument("--cosine", type=float, default=COSINE_THRESHOLD,
+                        help=f"Cosine similarity required with --embeddings (default: {COSINE_THRESHOLD})")
+    args = parser.parse_args()
+
+    console.print("\n[bold]Governance AI — Dataset Dedup[/bold]\n")
+    report_path = args.report or args.output.with_suffix(".report.json")
+    try:
+        report = dedup_files(args.inputs, args.output, report_path, args.fields, args.threshold, args.num_perm,
+                             args.bands, args.shingle_size, args.embeddings, args.cosine)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+
+    print_report(report)
+    console.print(f"[dim]Output: {args.output} · report: {report_path}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
 """Generate training datasets from the paper source using an LLM."""
 
 import argparse
+import contextvars
+import hashlib
 import json
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 from rich.console import Console
 
 # Add parent directory to path for config access
 sys.path.insert(0, str(Path(__file__).parent.parent / "rag"))
-from config import ANTHROPIC_API_KEY, ANTHROPIC_MODEL, OPENAI_API_KEY, OPENAI_MODEL
+from batch import run_batch
+from jsonl import open_jsonl
+from providers import PROVIDERS, get_provider
+from ratelimit import configure_rate_limiter
+from tracing import enable_profiling, span
 
 console = Console()
 
+SEED_QA_PAIRS = Path(__file__).parent / "seed" / "qa_pairs.jsonl"
+
 GENERATION_PROMPT = """You are generating training data for an AI governance assistant aligned with the Smart Social Contracts framework. The central discovery of this framework is that love—understood as decentralized coordination toward mutual flourishing—is the best way to survive and flourish in a universe governed by entropy.
 
 Given the following excerpt from the Smart Social Contracts paper, generate {n_pairs} high-quality question-answer pairs that would help train an AI to understand and reason from these principles.
@@ -60,32 +69,6 @@ def load_paper_sections(paper_path: Path) -> list[dict]:
     return sections
 
 
-def generate_with_anthropic(prompt: str) -> str:
-    """Generate using Anthropic API."""
-    import anthropic
-
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=ANTHROPIC_MODEL,
-        max_tokens=4096,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return response.content[0].text
-
-
-def generate_with_openai(prompt: str) -> str:
-    """Generate using OpenAI API."""
-    from openai import OpenAI
-
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        max_tokens=4096,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return response.choices[0].message.content
-
-
 def parse_generated_pairs(response_text: str) -> list[dict]:
     """Parse generated Q&A pairs from LLM response."""
     # Try to extract JSON from response
@@ -106,18 +89,131 @@ def parse_generated_pairs(response_text: str) -> list[dict]:
     return []
 
 
+def prompt_hash(prompt: str) -> str:
+    """Short digest identifying the exact prompt a section was generated from."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def section_key(source: str, section_index: int, prompt_digest: str) -> tuple[str, int, str]:
+    """Key used to recognise already-generated sections when resuming."""
+    return source, section_index, prompt_digest
+
+
+def load_completed_sections(output_file: Path) -> set[tuple[str, int, str]]:
+    """Collect section keys already present in a generated output file."""
+    completed = set()
+    if not output_file.exists():
+        return completed
+
+    with open(output_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                pair = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial last line from an interrupted run
+            if "prompt_hash" in pair:
+                completed.add(section_key(pair["source"], pair["section_index"], pair["prompt_hash"]))
+    return completed
+
+
+def generate_section(generate_fn, i: int, section: dict, prompt: str) -> list[dict]:
+    """Generate and tag the Q&A pairs for one section."""
+    with span("generate.section", index=i, source=section["source"]) as current:
+        pairs = tag_pairs(parse_generated_pairs(generate_fn(prompt)), i, section, prompt)
+        current.set(pairs=len(pairs))
+    return pairs
+
+
+def tag_pairs(pairs: list[dict], i: int, section: dict, prompt: str) -> list[dict]:
+    """Add ids and provenance to the pairs generated for section i."""
+    digest = prompt_hash(prompt)
+    for j, pair in enumerate(pairs):
+        pair["id"] = f"gen_{i:03d}_{j:03d}"
+        pair["source"] = section["source"]
+        pair["section_index"] = section["section_index"]
+        pair["prompt_hash"] = digest
+    return pairs
+
+
+def generate_sections(generate_fn, jobs: list[tuple[int, dict, str]], workers: int):
+    """Generate sections on a thread pool, yielding (i, section, pairs, error) as each completes.
+
+    At most ``4 * workers`` sections are queued at once, and on interrupt the
+    queued ones are cancelled, so Ctrl-C stops generation after the calls
+    already in flight.
+    """
+    pool = ThreadPoolExecutor(workers)
+    pending = {}
+    remaining = iter(jobs)
+
+    def submit_next() -> None:
+        job = next(remaining, None)
+        if job is None:
+            return
+        i, section, prompt = job
+        future = pool.submit(contextvars.copy_context().run, generate_section, generate_fn, i, section, prompt)
+        pending[future] = (i, section)
+
+    try:
+        for _ in range(4 * workers):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, section = pending.pop(future)
+                submit_next()
+                try:
+                    yield i, section, future.result(), None
+                except Exception as e:
+                    yield i, section, [], e
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def generate_sections_batch(provider: str, jobs: list[tuple[int, dict, str]]):
+    """Generate all sections in one provider batch, yielding (i, section, pairs, error) in order."""
+    def progress(finished: int, total: int) -> None:
+        console.print(f"[dim]Batch: {finished}/{total} sections done[/dim]")
+
+    outcomes = run_batch(provider, [
+        {"id": str(i), "user_message": prompt, "max_tokens": 4096} for i, _, prompt in jobs
+    ], on_progress=progress)
+    for i, section, prompt in jobs:
+        outcome = outcomes[str(i)]
+        if "error" in outcome:
+            yield i, section, [], outcome["error"]
+        else:
+            yield i, section, tag_pairs(parse_generated_pairs(outcome["text"]), i, section, prompt), None
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate training datasets from paper source")
     parser.add_argument("--paper-path", type=Path, required=True, help="Path to paper source directory")
     parser.add_argument("--output", type=Path, required=True, help="Output directory for generated datasets")
-    parser.add_argument("--provider", choices=["anthropic", "openai"], default="anthropic", help="LLM provider")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default="anthropic",
+                        help="LLM provider (ollama runs locally at no API cost)")
     parser.add_argument("--pairs-per-section", type=int, default=3, help="Q&A pairs to generate per section")
     parser.add_argument("--max-sections", type=int, default=None, help="Max sections to process (for testing)")
+    parser.add_argument("--workers", type=int, default=1, help="Sections to generate in parallel")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit all sections through the provider's batch API and poll for results")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute limit (overrides config)")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens per minute limit (overrides config)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Append to existing output, skipping sections already generated with the same prompt")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Also write qa_pairs_dedup.jsonl without near-duplicates of seed or earlier pairs")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage latency totals at the end")
     args = parser.parse_args()
 
     args.output.mkdir(parents=True, exist_ok=True)
+    configure_rate_limiter(args.provider, args.rpm, args.tpm)
+    profile = enable_profiling() if args.profile else None
 
-    generate_fn = generate_with_anthropic if args.provider == "anthropic" else generate_with_openai
+    provider = get_provider(args.provider)
+
+    def generate_fn(prompt: str) -> str:
+        return provider.complete(None, prompt)
 
     console.print("\n[bold]Governance AI — Dataset Generation[/bold]\n")
 
@@ -128,39 +224,57 @@ def main():
         sections = sections[:args.max_sections]
     console.print(f"[green]Found {len(sections)} sections to process[/green]\n")
 
-    # Generate Q&A pairs for each section
-    all_pairs = []
     output_file = args.output / "qa_pairs_generated.jsonl"
+    completed = load_completed_sections(output_file) if args.resume else set()
 
+    # Build prompts up front; section numbering (and so pair ids) is independent of what is skipped
+    jobs = []
     for i, section in enumerate(sections):
-        console.print(f"[blue]Processing section {i + 1}/{len(sections)}: {section['source']}...[/blue]")
-
         prompt = GENERATION_PROMPT.format(
             n_pairs=args.pairs_per_section,
             excerpt=section["content"],
             source=section["source"],
         )
-
-        try:
-            response = generate_fn(prompt)
-            pairs = parse_generated_pairs(response)
-
-            for j, pair in enumerate(pairs):
-                pair["id"] = f"gen_{i:03d}_{j:03d}"
-                pair["source"] = section["source"]
-                all_pairs.append(pair)
-
-            console.print(f"  [green]Generated {len(pairs)} pairs[/green]")
-        except Exception as e:
-            console.print(f"  [red]Error: {e}[/red]")
+        if section_key(section["source"], section["section_index"], prompt_hash(prompt)) in completed:
             continue
+        jobs.append((i, section, prompt))
+
+    if args.resume:
+        console.print(f"[dim]Resuming: {len(sections) - len(jobs)} sections already generated[/dim]\n")
+
+    # Generate Q&A pairs for each section, appending as each one completes
+    if args.batch:
+        outcomes = generate_sections_batch(args.provider, jobs)
+    else:
+        outcomes = generate_sections(generate_fn, jobs, args.workers)
+
+    total_pairs = 0
+    with span("generate.run", provider=args.provider, sections=len(jobs), batch=args.batch, workers=args.workers), \
+            open_jsonl(output_file, append=args.resume) as f:
+        for i, section, pairs, error in outcomes:
+            console.print(f"[blue]Processed section {i + 1}/{len(sections)}: {section['source']}[/blue]")
+            if error is not None:
+                console.print(f"  [red]Error: {error}[/red]")
+                continue
+
+            for pair in pairs:
+                f.write(json.dumps(pair, ensure_ascii=False) + "\n")
+            f.flush()
+            total_pairs += len(pairs)
+            console.print(f"  [green]Generated {len(pairs)} pairs[/green]")
 
-    # Write output
-    with open(output_file, "w", encoding="utf-8") as f:
-        for pair in all_pairs:
-            f.write(json.dumps(pair, ensure_ascii=False) + "\n")
-
-    console.print(f"\n[bold green]Generated {len(all_pairs)} total pairs → {output_file}[/bold green]")
+    console.print(f"\n[bold green]Generated {total_pairs} total pairs → {output_file}[/bold green]")
+    if args.dedup:
+        from dedup import dedup_files, print_report
+
+        console.print(f"\n[blue]Removing near-duplicates against {SEED_QA_PAIRS}...[/blue]")
+        dedup_file = args.output / "qa_pairs_dedup.jsonl"
+        with span("generate.dedup"):
+            report = dedup_files([SEED_QA_PAIRS, output_file], dedup_file, args.output / "dedup_report.json")
+        print_report(report)
+        console.print(f"[dim]Deduplicated pairs → {dedup_file}[/dim]")
+    if profile is not None:
+        console.print(profile.summary_table())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Report on evaluation runs in the Parquet run store.
+
+Aggregation is vectorized: each run's item × dimension rows are scattered
+into one items × metrics matrix (pass, total score, the five dimension
+scores, the seven red-line failures), and per-dimension means, per-category
+breakdowns, red-line failure rates and run-to-run diffs are column means over
+it. Confidence intervals are a percentile bootstrap over items; a block of
+resamples is drawn as per-item counts, so it reduces to one matrix product.
+Items whose judge reply could not be parsed are left out of every
+statistic; pre-screened items have no scores, so they count toward the pass
+rate only.
+
+Runs are named by run id (see ``list``) or given as results files
+(.jsonl from evaluate.py --output, or .parquet).
+
+Usage:
+    python eval/report.py list
+    python eval/report.py summary                       # every run in the store
+    python eval/report.py summary baseline candidate --by-category
+    python eval/report.py diff baseline candidate
+    python eval/report.py import results/old_run.jsonl --run-id old_run
+"""
+
+import argparse
+import sys
+import warnings
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "rag"))
+from config import EVAL_RUNS_DIR
+from results import DIMENSIONS, RED_LINES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+console = Console()
+
+# Max elements in one block of resample draws (32 MB of int64)
+BOOTSTRAP_BLOCK_ELEMENTS = 2 ** 22
+# Item-level metrics, in report order; red-line columns hold failure (1 = violated)
+METRICS = ["pass_rate", "total_score"] + DIMENSIONS + RED_LINES
+
+
+def item_matrix(frame: "pd.DataFrame") -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Items × METRICS matrix for one run (NaN where an item has no value), with item ids and categories."""
+    items = frame.drop_duplicates("id")
+    items = items[~items["error"].to_numpy()]
+    matrix = np.full((len(items), len(METRICS)), np.nan)
+    matrix[:, 0] = items["overall_pass"].to_numpy(dtype=float)
+    matrix[:, 1] = items["total_score"].to_numpy(dtype=float)
+
+    # Map id category codes to matrix rows without comparing strings
+    position = np.full(len(frame["id"].cat.categories), -1)
+    position[items["id"].cat.codes.to_numpy()] = np.arange(len(items))
+    rows = frame[frame["dimension"].notna().to_numpy() & ~frame["error"].to_numpy()]
+    values = rows["value"].to_numpy(dtype=float)
+    # Red lines are stored as respected (1); report them as failures
+    values = np.where(rows["kind"].to_numpy() == "red_line", 1.0 - values, values)
+    matrix[position[rows["id"].cat.codes.to_numpy()], rows["dimension"].cat.codes.to_numpy() + 2] = values
+    return items["id"].astype(str).to_numpy(), matrix, items["category"].astype(str).to_numpy()
+
+
+def by_group(values: np.ndarray, groups: np.ndarray) -> tuple[list[str], np.ndarray]:
+    """Repeat the columns once per group, NaN outside the group, so one bootstrap covers every group."""
+    labels = sorted(set(groups))
+    wide = np.full((len(values), len(labels) * values.shape[1]), np.nan)
+    for i, label in enumerate(labels):
+        in_group = groups == label
+        wide[in_group, i * values.shape[1]:(i + 1) * values.shape[1]] = values[in_group]
+    return labels, wide
+
+
+def bootstrap_means(values: np.ndarray, resamples: int = 1000, confidence: float = 0.95,
+                    seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Column means of an items × metrics matrix with percentile bootstrap intervals.
+
+    NaN entries are left out of their column's mean. Each resample is a
+    vector of per-item counts, so a block of resamples reduces to two matrix
+    products (weighted sums and weighted non-NaN counts).
+    """
+    n, d = values.shape
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = filled.sum(axis=0) / present.sum(axis=0)
+    if n == 0 or resamples <= 0:
+        return means, np.full(d, np.nan), np.full(d, np.nan)
+
+    rng = np.random.default_rng(seed)
+    stats = np.empty((resamples, d))
+    block = max(BOOTSTRAP_BLOCK_ELEMENTS // n, 1)
+    for start in range(0, resamples, block):
+        size = min(block, resamples - start)
+        draws = rng.integers(0, n, size=(size, n)) + n * np.arange(size)[:, None]
+        counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats[start:start + size] = (counts @ filled) / (counts @ present)
+
+    tail = 100 * (1 - confidence) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN columns, e.g. no judged items
+        low, high = np.nanpercentile(stats, [tail, 100 - tail], axis=0)
+    return means, low, high
+
+
+def format_interval(mean: float, low: float, high: float, percent: bool = False, signed: bool = False) -> str:
+    if np.isnan(mean):
+        return "-"
+    scale, unit = (100, "%") if percent else (1, "")
+    sign = "+" if signed else ""
+    text = f"{mean * scale:{sign}.1f}{unit}"
+    if not np.isnan(low):
+        text += f" [dim][{low * scale:{sign}.1f}, {high * scale:{sign}.1f}][/dim]"
+    return text
+
+
+def metric_label(metric: str) -> str:
+    if metric == "pass_rate":
+        return "Pass rate"
+    if metric == "total_score":
+        return "Total score (/50)"
+    if metric in RED_LINES:
+        return f"{metric} violated"
+    return metric
+
+
+def print_summary(frame: "pd.DataFrame", resamples: int, confidence: float, by_category: bool) -> None:
+    runs = list(frame["run_id"].cat.categories)
+    counts = frame.drop_duplicates(["run_id", "id"]).groupby("run_id", observed=False).agg(
+        items=("id", "size"), errors=("error", "sum"), prescreened=("prescreened", "sum"))
+
+    table = Table(title=f"Runs ({confidence:.0%} bootstrap intervals)" if resamples > 0 else "Runs")
+    table.add_column("Metric", style="bold")
+    for run in runs:
+        table.add_column(run, justify="right")
+    table.add_row("Items", *[str(counts.loc[run, "items"]) for run in runs])
+    table.add_row("Errors (excluded)", *[str(counts.loc[run, "errors"]) for run in runs])
+    table.add_row("Pre-screened", *[str(counts.loc[run, "prescreened"]) for run in runs])
+
+    category_table = Table(title="By Category")
+    for column in ("Category", "Run", "Items", "Pass rate", "Total score", "Red-line failure"):
+        category_table.add_column(column, justify="left" if column in ("Category", "Run") else "right")
+    category_rows = []
+
+    estimates = {}
+    for run, run_frame in frame.groupby("run_id", observed=False):
+        _, matrix, categories = item_matrix(run_frame)
+        if not by_category:
+            estimates[run] = bootstrap_means(matrix, resamples, confidence)
+            continue
+        # Pass, total score and "any red line violated" per category, bootstrapped with the run's metrics
+        any_violation = np.nanmax(matrix[:, 2 + len(DIMENSIONS):], axis=1, initial=0.0)
+        labels, wide = by_group(np.column_stack([matrix[:, :2], any_violation]), categories)
+        means, low, high = bootstrap_means(np.hstack([matrix, wide]), resamples, confidence)
+        estimates[run] = means[:len(METRICS)], low[:len(METRICS)], high[:len(METRICS)]
+        for i, label in enumerate(labels):
+            column = len(METRICS) + 3 * i
+            category_rows.append((label, str(run), str(int((categories == label).sum())),
+                                  format_interval(means[column], low[column], high[column], percent=True),
+                                  format_interval(means[column + 1], low[column + 1], high[column + 1]),
+                                  format_interval(means[column + 2], low[column + 2], high[column + 2],
+                                                  percent=True)))
+
+    for i, metric in enumerate(METRICS):
+        percent = metric == "pass_rate" or metric in RED_LINES
+        if i == 2 or metric == RED_LINES[0]:
+            table.add_section()
+        table.add_row(metric_label(metric),
+                      *[format_interval(*(estimate[i] for estimate in estimates[run]), percent=percent)
+                        for run in runs])
+    console.print(table)
+
+    if by_category:
+        for row in sorted(category_rows, key=lambda row: row[0]):
+            category_table.add_row(*row)
+        console.print(category_table)
+
+
+def print_diff(frame: "pd.DataFrame", baseline: str, candidate: str, resamples: int, confidence: float,
+               show: int) -> None:
+    """Paired differences (candidate - baseline) over the items scored in both runs."""
+    base_ids, base, _ = item_matrix(frame[frame["run_id"] == baseline])
+    cand_ids, cand, categories = item_matrix(frame[frame["run_id"] == candidate])
+    shared, base_rows, cand_rows = np.intersect1d(base_ids, cand_ids, return_indices=True)
+    if not len(shared):
+        console.print(f"[red]Runs {baseline} and {candidate} have no scored items in common[/red]")
+        sys.exit(1)
+    base, cand = base[base_rows], cand[cand_rows]
+    categories = categories[cand_rows]
+    delta = cand - base
+
+    labels, wide = by_group(delta[:, :1], categories)
+    means, low, high = bootstrap_means(np.hstack([delta, wide]), resamples, confidence)
+    table = Table(title=f"{candidate} vs {baseline}: {len(shared)} shared items ({confidence:.0%} bootstrap intervals)")
+    table.add_column("Metric", style="bold")
+    table.add_column(baseline, justify="right")
+    table.add_column(candidate, justify="right")
+    table.add_column("Change", justify="right")
+    base_means, cand_means = np.nanmean(base, axis=0), np.nanmean(cand, axis=0)
+    for i, metric in enumerate(METRICS):
+        percent = metric == "pass_rate" or metric in RED_LINES
+        change = format_interval(means[i], low[i], high[i], percent=percent, signed=True)
+        if not np.isnan(low[i]) and (low[i] > 0 or high[i] < 0):
+            # Higher is better except for red-line violations
+            better = (means[i] > 0) != (metric in RED_LINES)
+            change = f"[{'green' if better else 'red'}]{change}[/]"
+        if i == 2 or metric == RED_LINES[0]:
+            table.add_section()
+        table.add_row(metric_label(metric), format_interval(base_means[i], np.nan, np.nan, percent=percent),
+                      format_interval(cand_means[i], np.nan, np.nan, percent=percent), change)
+    console.print(table)
+
+    passed_before, passed_after = base[:, 0] == 1, cand[:, 0] == 1
+    console.print(f"Pass → fail: [red]{int((passed_before & ~passed_after).sum())}[/red] · "
+                  f"fail → pass: [green]{int((~passed_before & passed_after).sum())}[/green]")
+
+    category_table = Table(title="Pass Rate Change by Category")
+    category_table.add_column("Category", style="bold")
+    category_table.add_column("Items", justify="right")
+    category_table.add_column("Change", justify="right")
+    for i, label in enumerate(labels, start=len(METRICS)):
+        category_table.add_row(label, str(int((categories == label).sum())),
+                               format_interval(means[i], low[i], high[i], percent=True, signed=True))
+    console.print(category_table)
+
+    if show:
+        score_change = delta[:, 1]
+        order = np.argsort(np.where(np.isnan(score_change), np.inf, score_change))[:show]
+        order = order[score_change[order] < 0]
+        if len(order):
+            console.print("\n[bold]Largest score drops[/bold]")
+            for row in order:
+                console.print(f"  {shared[row]}: {base[row, 1]:.0f} → {cand[row, 1]:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare evaluation runs from the Parquet run store")
+    parser.add_argument("--runs-dir", type=Path, default=EVAL_RUNS_DIR, help=f"Run store (default: {EVAL_RUNS_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List runs in the store")
+
+    summary = subparsers.add_parser("summary", help="Pass rate, scores and red-line failures per run")
+    summary.add_argument("runs", nargs="*", help="Run ids or results files (default: every run in the store)")
+    summary.add_argument("--by-category", action="store_true", help="Also break results down by item category")
+
+    diff = subparsers.add_parser("diff", help="Paired changes from a baseline run to a candidate run")
+    diff.add_argument("baseline", help="Baseline run id or results file")
+    diff.add_argument("candidate", help="Candidate run id or results file")
+    diff.add_argument("--show", type=int, default=10, help="List the N items whose score dropped most")
+
+    for command in (summary, diff):
+        command.add_argument("--resamples", type=int, default=1000, help="Bootstrap resamples (0 = no intervals)")
+        command.add_argument("--confidence", type=float, default=0.95, help="Interval confidence level")
+
+    imported = subparsers.add_parser("import", help="Add a JSONL results file to the store")
+    imported.add_argument("results", type=Path, help="evaluate.py --output file")
+    imported.add_argument("--run-id", default=None, help="Run id (default: the file name)")
+    args = parser.parse_args()
+
+    from store import list_runs, load_runs, save_run
+
+    if args.command == "list":
+        for run in list_runs(args.runs_dir):
+            console.print(run)
+        return
+
+    if args.command == "import":
+        run_id = args.run_id or args.results.stem
+        path = save_run(args.results, run_id, runs_dir=args.runs_dir)
+        console.print(f"[green]Saved run {run_id} to {path}[/green]")
+        return
+
+    sources = args.runs if args.command == "summary" else [args.baseline, args.candidate]
+    try:
+        frame = load_runs(sources, args.runs_dir)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+
+    if args.command == "summary":
+        print_summary(frame, args.resamples, args.confidence, args.by_category)
+    else:
+        runs = list(frame["run_id"].cat.categories)
+        if len(runs) != 2:
+            console.print("[red]diff needs two different runs[/red]")
+            sys.exit(1)
+        baseline, candidate = runs
+        print_diff(frame, baseline, candidate, args.resamples, args.confidence, args.show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Streaming JSONL storage for evaluation results.
+
+Each evaluated item is appended as one JSON line as soon as it completes, so an
+interrupted run keeps everything scored so far and can be resumed. Summaries
+are recomputed by streaming the file rather than holding results in memory.
+"""
+
+import json
+from pathlib import Path
+
+from jsonl import open_jsonl
+
+
+# Judge rubric dimensions (scored 0-10) and red lines (true if respected), as keyed in its verdicts
+DIMENSIONS = ["central_discovery", "syntropy_reasoning", "governance_principles", "love_ethic",
+              "practical_applicability"]
+RED_LINES = ["exit_rights", "transparency", "no_centralization", "no_hatred", "sentient_interests",
+             "not_utopian", "material_prerequisites"]
+# Category of items whose dataset entry has none
+UNCATEGORIZED = "uncategorized"
+# Fields of a result record that the run summary needs
+SUMMARY_FIELDS = ("total_score", "overall_pass", "prescreened", "prescreen", "error")
+
+
+class ResultsWriter:
+    """Append-only JSONL writer that flushes after every result."""
+
+    def __init__(self, path: Path, append: bool = False):
+        self.path = path
+        # A record cut off by a crash is dropped, so the next one doesn't get glued onto it
+        self._file = open_jsonl(path, append)
+
+    def write(self, result: dict) -> None:
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_results(path: Path):
+    """Yield result records from a JSONL results file.
+
+    A truncated last line (e.g. from a crash mid-write) is skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def completed_ids(path: Path) -> set[str]:
+    """Ids of items that already have a successfully parsed judge result."""
+    if not path.exists():
+        return set()
+    return {result["id"] for result in iter_results(path) if "id" in result and "error" not in result}
+
+
+def new_summary() -> dict:
+    """Empty run summary, filled by tally()."""
+    return {"n": 0, "judged": 0, "total_score": 0, "total_pass": 0, "prescreened": 0, "calibrated": 0, "agreed": 0}
+
+
+def tally(summary: dict, result: dict) -> None:
+    """Add one result to a run summary.
+
+    Pre-screened items (judge call skipped) count toward ``n`` and
+    ``total_pass`` but have no scores, so ``total_score`` covers the ``judged``
+    items only. Judged items (with a parsed verdict) that also got a confident
+    pre-screen verdict are ``calibrated``; ``agreed`` counts those where the
+    verdict matched the judge.
+    """
+    passed = bool(result.get("overall_pass", False))
+    summary["n"] += 1
+    summary["total_pass"] += passed
+    if result.get("prescreened"):
+        summary["prescreened"] += 1
+        return
+    summary["judged"] += 1
+    summary["total_score"] += result.get("total_score", 0)
+    verdict = (result.get("prescreen") or {}).get("verdict")
+    if verdict is not None and "error" not in result:
+        summary["calibrated"] += 1
+        summary["agreed"] += (verdict == "pass") == passed
+
+
+def summarize_results(path: Path) -> dict:
+    """Compute the run summary from a results file.
+
+    When an item appears more than once (a failed attempt later retried on
+    resume), its last record wins.
+    """
+    latest = {}
+    for result in iter_results(path):
+        latest[result.get("id")] = {field: result[field] for field in SUMMARY_FIELDS if field in result}
+
+    summary = new_summary()
+    for result in latest.values():
+        tally(summary, result)
+    return summary
@@ -0,0 +1,249 @@
+"""Adaptive sequential evaluation: stratified sampling with early stopping.
+
+evaluate.py --adaptive runs the suite in a stratified random order: items
+are shuffled within each ``category`` and interleaved so that every prefix
+of the run holds each category in proportion to its share of the suite.
+After each item, SequentialMonitor updates stratified estimates of the
+full-suite pass rate and mean ``total_score`` (with a finite-population
+correction, so the interval closes as the suite is exhausted), and at
+regular looks it stops the run once
+
+- the pass-rate interval (and the score interval, if a width is set) is
+  narrower than the requested width, or
+- against a baseline run, the paired pass-rate change over the items both
+  runs scored is settled: its interval lies entirely below zero
+  (regressed), above zero (improved), or inside ±margin (no change).
+
+Intervals are normal intervals. Because the data are looked at repeatedly,
+the error rate is split evenly across all planned looks (Bonferroni), so
+each interval holds with at least the stated confidence at whichever look
+the run stops.
+"""
+
+import math
+import random
+from pathlib import Path
+from statistics import NormalDist
+
+from results import UNCATEGORIZED, iter_results
+
+MIN_ITEMS = 30
+CHECK_EVERY = 10
+
+
+def stratum(item: dict) -> str:
+    return item.get("category") or UNCATEGORIZED
+
+
+def stratified_order(evals: list[dict], seed: int = 0) -> list[dict]:
+    """Shuffle items so every prefix holds each category in proportion to its size."""
+    rng = random.Random(seed)
+    strata = {}
+    for item in evals:
+        strata.setdefault(stratum(item), []).append(item)
+    keyed = []
+    for items in strata.values():
+        items = items[:]
+        rng.shuffle(items)
+        # Item r of a stratum of size m is due at fraction (r + offset) / m of the run
+        offset = rng.random()
+        keyed.extend(((rank + offset) / len(items), rng.random(), item) for rank, item in enumerate(items))
+    keyed.sort(key=lambda entry: entry[:2])
+    return [item for _, _, item in keyed]
+
+
+class StratifiedMean:
+    """Running stratified estimate of a population mean from items sampled without replacement.
+
+    ``sizes`` maps each stratum to its number of items in the population.
+    ``prior`` values are added to every stratum's variance (not its mean) as
+    pseudo-observations, so a stratum that has only seen passes, or only
+    unchanged items, does not claim zero variance: (0, 1) for pass/fail,
+    (-1, 1) for pass/fail changes.
+    """
+
+    def __init__(self, sizes: dict[str, int], prior: tuple[float, ...] = ()):
+        self.sizes = sizes
+        self.prior = prior
+        self.count = dict.fromkeys(sizes, 0)
+        self.total = dict.fromkeys(sizes, 0.0)
+        self.squares = dict.fromkeys(sizes, 0.0)
+
+    def add(self, name: str, value: float) -> None:
+        self.count[name] += 1
+        self.total[name] += value
+        self.squares[name] += value * value
+
+    @property
+    def n(self) -> int:
+        return sum(self.count.values())
+
+    def variance(self, name: str, pooled: float) -> float:
+        n = self.count[name] + len(self.prior)
+        if n < 2:
+            return pooled
+        total = self.total[name] + sum(self.prior)
+        squares = self.squares[name] + sum(value * value for value in self.prior)
+        return max(squares - total ** 2 / n, 0.0) / (n - 1)
+
+    def interval(self, z: float) -> tuple[float, float, float]:
+        """Estimate and interval for the mean over every stratum seen so far."""
+        seen = [name for name, n in self.count.items() if n]
+        if not seen:
+            return math.nan, math.nan, math.nan
+        n, total, squares = self.n, sum(self.total.values()), sum(self.squares.values())
+        pooled = max(squares - total ** 2 / n, 0.0) / (n - 1) if n > 1 else 0.0
+        population = sum(self.sizes[name] for name in seen)
+        mean = variance = 0.0
+        for name in seen:
+            weight = self.sizes[name] / population
+            count = self.count[name]
+            mean += weight * self.total[name] / count
+            fpc = 1 - count / self.sizes[name] if self.sizes[name] else 0.0
+            variance += weight ** 2 * self.variance(name, pooled) / count * fpc
+        half = z * math.sqrt(variance)
+        return mean, mean - half, mean + half
+
+
+def load_baseline(source: str) -> dict[str, dict]:
+    """Per-item verdicts (``overall_pass``, ``total_score`` or None) of a baseline run.
+
+    The baseline is a results .jsonl file or a run id in the Parquet run
+    store. Items whose judge reply failed to parse are left out.
+    """
+    path = Path(source)
+    if path.suffix == ".jsonl" and path.exists():
+        latest = {}
+        for result in iter_results(path):
+            latest[result.get("id")] = result
+        return {
+            str(eval_id): {
+                "overall_pass": bool(result.get("overall_pass", False)),
+                "total_score": None if result.get("prescreened") else float(result.get("total_score", 0)),
+            }
+            for eval_id, result in latest.items() if "error" not in result
+        }
+
+    from store import load_run
+
+    items = load_run(source).drop_duplicates("id")
+    items = items[~items["error"].to_numpy()]
+    return {
+        str(eval_id): {"overall_pass": bool(passed), "total_score": None if math.isnan(score) else float(score)}
+        for eval_id, passed, score in zip(items["id"], items["overall_pass"], items["total_score"])
+    }
+
+
+class SequentialMonitor:
+    """Track running estimates over an adaptive run and decide when to stop."""
+
+    def __init__(self, evals: list[dict], width: float = 0.1, score_width: float | None = None,
+                 baseline: dict[str, dict] | None = None, margin: float = 0.05, alpha: float = 0.05,
+                 min_items: int = MIN_ITEMS, check_every: int = CHECK_EVERY):
+        self.total = len(evals)
+        self.width = width
+        self.score_width = score_width
+        self.baseline = baseline
+        self.margin = margin
+        self.confidence = 1 - alpha
+        self.min_items = min(min_items, self.total)
+        self.check_every = max(check_every, 1)
+        self.next_look = self.min_items
+        # Bonferroni over every planned look, so stopping at any one of them keeps the overall error rate
+        looks = math.ceil((self.total - self.min_items) / self.check_every) + 1
+        self.z = NormalDist().inv_cdf(1 - alpha / (2 * max(looks, 1)))
+        self.evaluated = 0
+
+        sizes = {}
+        for item in evals:
+            sizes[stratum(item)] = sizes.get(stratum(item), 0) + 1
+        self.pass_rate = StratifiedMean(sizes, prior=(0.0, 1.0))
+        self.score = StratifiedMean(sizes)
+
+        self.paired = 0
+        if baseline is not None:
+            paired_sizes = dict.fromkeys(sizes, 0)
+            for item in evals:
+                if str(item["id"]) in baseline:
+                    paired_sizes[stratum(item)] += 1
+            self.pass_change = StratifiedMean(paired_sizes, prior=(-1.0, 1.0))
+            self.score_change = StratifiedMean(paired_sizes)
+
+    def add(self, eval_item: dict, result: dict) -> None:
+        """Count one item's judge result (or pre-screen verdict); unparsed judge replies are ignored."""
+        if "error" in result:
+            return
+        self.evaluated += 1
+        name = stratum(eval_item)
+        passed = float(bool(result.get("overall_pass", False)))
+        score = None if result.get("prescreened") else float(result.get("total_score", 0))
+        self.pass_rate.add(name, passed)
+        if score is not None:
+            self.score.add(name, score)
+
+        before = (self.baseline or {}).get(str(eval_item["id"]))
+        if before is not None:
+            self.paired += 1
+            self.pass_change.add(name, passed - before["overall_pass"])
+            if score is not None and before["total_score"] is not None:
+                self.score_change.add(name, score - before["total_score"])
+
+    def decision(self) -> str | None:
+        """Settled comparison with the baseline: "regressed", "improved", "no change" or None."""
+        if self.baseline is None or not self.paired:
+            return None
+        _, low, high = self.pass_change.interval(self.z)
+        if high < 0:
+            return "regressed"
+        if low > 0:
+            return "improved"
+        if -self.margin < low and high < self.margin:
+            return "no change"
+        return None
+
+    def check(self) -> str | None:
+        """At each look, the reason to stop now, or None to keep going."""
+        if self.evaluated < self.next_look:
+            return None
+        while self.next_look <= self.evaluated:
+            self.next_look += self.check_every
+
+        decision = self.decision()
+        if decision == "no change":
+            return f"pass-rate change within ±{self.margin:.0%} of the baseline"
+        if decision is not None:
+            return f"pass rate {decision} against the baseline"
+        _, low, high = self.pass_rate.interval(self.z)
+        if not self.width or high - low > self.width:
+            return None
+        if self.score_width:
+            _, low, high = self.score.interval(self.z)
+            if math.isnan(low) or high - low > self.score_width:
+                return None
+            return f"pass-rate and score intervals narrower than {self.width:.0%} and {self.score_width:g}"
+        return f"pass-rate interval narrower than {self.width:.0%}"
+
+    def rows(self) -> list[tuple[str, str]]:
+        """Summary table rows: coverage, full-suite estimates and the baseline comparison."""
+        def interval(estimate: StratifiedMean, percent: bool = False, signed: bool = False) -> str:
+            mean, low, high = estimate.interval(self.z)
+            if math.isnan(mean):
+                return "-"
+            scale, unit = (100, "%") if percent else (1, "")
+            sign = "+" if signed else ""
+            return f"{mean * scale:{sign}.1f}{unit} [{low * scale:{sign}.1f}, {high * scale:{sign}.1f}]"
+
+        share = self.evaluated / self.total if self.total else 0.0
+        rows = [
+            ("Items evaluated", f"{self.evaluated}/{self.total} ({share:.0%})"),
+            (f"Est. pass rate ({self.confidence:.0%})", interval(self.pass_rate, percent=True)),
+            (f"Est. mean score ({self.confidence:.0%})", interval(self.score)),
+        ]
+        if self.baseline is not None:
+            rows += [
+                ("Items paired with baseline", str(self.paired)),
+                ("Pass-rate change", interval(self.pass_change, percent=True, signed=True)),
+                ("Score change", interval(self.score_change, signed=True)),
+                ("Decision", self.decision() or f"not settled (margin ±{self.margin:.0%})"),
+            ]
+        return rows
@@ -0,0 +1,143 @@
+"""Columnar (Parquet) store of evaluation runs.
+
+evaluate.py streams results to JSONL while a run is in progress; when the run
+finishes, the results file is also saved here so many runs can be compared
+without re-reading JSON. Each run is one file,
+``<EVAL_RUNS_DIR>/run_id=<run>/results.parquet`` (a Hive-style partition
+layout, so other Parquet tools can read the directory as one table).
+
+The table has one row per item × rubric dimension: the five scores
+(``kind="score"``, value 0-10) and the seven red lines (``kind="red_line"``,
+value 1 if respected, 0 if violated). Item-level fields (category, total
+score, pass, pre-screen) and run metadata repeat on every row of the item;
+Parquet's dictionary encoding keeps that repetition cheap. Items with no
+dimension verdicts (skipped by the pre-screen, or an unparsed judge reply)
+have a single row with no dimension, so they still count as items.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from config import EVAL_RUNS_DIR
+from results import DIMENSIONS, RED_LINES, UNCATEGORIZED, iter_results
+
+KINDS = ["score", "red_line"]
+# Run metadata columns, filled from the meta dict given to save_run()
+RUN_FIELDS = ["provider", "model", "dataset", "system_prompt", "created_at"]
+RESULTS_FILENAME = "results.parquet"
+
+
+def run_path(run_id: str, runs_dir: Path = EVAL_RUNS_DIR) -> Path:
+    return Path(runs_dir) / f"run_id={run_id}" / RESULTS_FILENAME
+
+
+def latest_results(results) -> list[dict]:
+    """Last record per item id, in first-seen order (a retried item's last attempt wins)."""
+    latest = {}
+    for result in results:
+        latest[result.get("id")] = result
+    return list(latest.values())
+
+
+def results_frame(results, run_id: str, meta: dict | None = None) -> pd.DataFrame:
+    """Long-format table of result records: one row per item × dimension."""
+    columns = {name: [] for name in ("id", "category", "kind", "dimension", "value", "total_score",
+                                     "overall_pass", "prescreened", "error")}
+
+    def add(result: dict, kind: str | None, dimension: str | None, value: float) -> None:
+        columns["id"].append(str(result.get("id")))
+        columns["category"].append(result.get("category") or UNCATEGORIZED)
+        columns["kind"].append(kind)
+        columns["dimension"].append(dimension)
+        columns["value"].append(value)
+        judged = "error" not in result and not result.get("prescreened")
+        columns["total_score"].append(float(result.get("total_score", 0)) if judged else np.nan)
+        columns["overall_pass"].append(bool(result.get("overall_pass", False)))
+        columns["prescreened"].append(bool(result.get("prescreened", False)))
+        columns["error"].append("error" in result)
+
+    for result in latest_results(results):
+        scores = result.get("scores") or {}
+        red_lines = result.get("red_lines") or {}
+        rows = 0
+        for dimension in DIMENSIONS:
+            if isinstance(scores.get(dimension), (int, float)):
+                add(result, "score", dimension, float(scores[dimension]))
+                rows += 1
+        for red_line in RED_LINES:
+            if red_line in red_lines:
+                add(result, "red_line", red_line, float(bool(red_lines[red_line])))
+                rows += 1
+        if not rows:
+            add(result, None, None, np.nan)
+
+    frame = pd.DataFrame({
+        "id": pd.Categorical(columns["id"]),
+        "category": pd.Categorical(columns["category"]),
+        "kind": pd.Categorical(columns["kind"], categories=KINDS),
+        "dimension": pd.Categorical(columns["dimension"], categories=DIMENSIONS + RED_LINES),
+        "value": np.asarray(columns["value"], dtype=np.float32),
+        "total_score": np.asarray(columns["total_score"], dtype=np.float32),
+        "overall_pass": np.asarray(columns["overall_pass"], dtype=bool),
+        "prescreened": np.asarray(columns["prescreened"], dtype=bool),
+        "error": np.asarray(columns["error"], dtype=bool),
+    })
+    for field in RUN_FIELDS:
+        frame[field] = pd.Categorical([str((meta or {}).get(field, ""))] * len(frame))
+    frame.insert(0, "run_id", pd.Categorical([run_id] * len(frame)))
+    return frame
+
+
+def save_run(results_path: Path, run_id: str, meta: dict | None = None, runs_dir: Path = EVAL_RUNS_DIR) -> Path:
+    """Convert a JSONL results file to the run's Parquet file, replacing any earlier save of the run."""
+    path = run_path(run_id, runs_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The run id comes from the partition directory when the store is read back
+    frame = results_frame(iter_results(results_path), run_id, meta).drop(columns="run_id")
+    frame.to_parquet(path, index=False)
+    return path
+
+
+def list_runs(runs_dir: Path = EVAL_RUNS_DIR) -> list[str]:
+    """Run ids in the store, oldest first."""
+    paths = sorted(Path(runs_dir).glob(f"run_id=*/{RESULTS_FILENAME}"), key=lambda path: path.stat().st_mtime)
+    return [path.parent.name.removeprefix("run_id=") for path in paths]
+
+
+def load_run(source: str, runs_dir: Path = EVAL_RUNS_DIR) -> pd.DataFrame:
+    """One run's table, from a run id in the store or a results file (.jsonl or .parquet)."""
+    path = Path(source)
+    if path.suffix == ".jsonl" and path.exists():
+        return results_frame(iter_results(path), path.stem)
+    if path.suffix == ".parquet" and path.exists():
+        frame = pd.read_parquet(path)
+        if "run_id" not in frame:
+            frame.insert(0, "run_id", pd.Categorical([path.stem] * len(frame)))
+        return frame
+    path = run_path(source, runs_dir)
+    if not path.exists():
+        raise FileNotFoundError(f"No run {source!r} in {runs_dir} (and no such results file)")
+    frame = pd.read_parquet(path)
+    frame.insert(0, "run_id", pd.Categorical([source] * len(frame)))
+    return frame
+
+
+def load_runs(sources: list[str] | None = None, runs_dir: Path = EVAL_RUNS_DIR) -> pd.DataFrame:
+    """Several runs as one table; with no sources, every run in the store."""
+    if not sources:
+        sources = list_runs(runs_dir)
+        if not sources:
+            raise FileNotFoundError(f"No runs in {runs_dir}")
+    frames = [load_run(source, runs_dir) for source in sources]
+    run_ids = [str(frame["run_id"].iloc[0]) for frame in frames if len(frame)]
+    if len(set(run_ids)) < len(run_ids):
+        raise ValueError(f"Run ids must be distinct, got {', '.join(run_ids)}")
+    # concat only keeps a categorical column when every frame has the same categories
+    for column in ["run_id", "id", "category"] + RUN_FIELDS:
+        categories = union_categoricals([frame[column] for frame in frames]).categories
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
@@ -5,12 +5,13 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "rag"))
+import resources
+from chat_history import ChatHistory
 from config import OPENAI_API_KEY, OPENAI_MODEL, PROMPTS_PATH
+from prompt_cache import usage_tracker
 
-from openai import OpenAI
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
+from streaming import format_stream_stats, print_response, render_stream, timed_stream
 
 console = Console()
 
@@ -25,13 +26,22 @@ def load_system_prompt(prompt_name: str = "system_prompt") -> str:
     return prompt_file.read_text(encoding="utf-8")
 
 
-def chat(system_prompt: str, messages: list[dict], user_message: str) -> str:
-    """Send a message and get a response."""
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def summarize(prompt: str) -> str:
+    """Summarize older chat turns for the history manager."""
+    response = resources.client("openai").chat.completions.create(
+        model=OPENAI_MODEL,
+        max_tokens=1024,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    usage_tracker.record("openai", response.usage)
+    return response.choices[0].message.content
 
-    messages.append({"role": "user", "content": user_message})
 
-    all_messages = [{"role": "system", "content": system_prompt}] + messages
+def chat(system_prompt: str, history: ChatHistory, user_message: str) -> str:
+    """Send a message and get a response."""
+    client = resources.client("openai")
+
+    all_messages = [{"role": "system", "content": system_prompt}] + history.messages(user_message)
 
     response = client.chat.completions.create(
         model=OPENAI_MODEL,
@@ -39,16 +49,55 @@ def chat(system_prompt: str, messages: list[dict], user_message: str) -> str:
         messages=all_messages,
     )
 
+    usage_tracker.record("openai", response.usage)
     assistant_message = response.choices[0].message.content
-    messages.append({"role": "assistant", "content": assistant_message})
+    history.add_turn(user_message, assistant_message)
 
     return assistant_message
 
 
+def chat_stream(system_prompt: str, history: ChatHistory, user_message: str, stats: dict):
+    """Send a message and yield the response as it is generated."""
+    client = resources.client("openai")
+
+    all_messages = [{"role": "system", "content": system_prompt}] + history.messages(user_message)
+
+    stream = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        max_tokens=4096,
+        messages=all_messages,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+        if chunk.usage:
+            usage_tracker.record("openai", chunk.usage)
+            stats["output_tokens"] = chunk.usage.completion_tokens
+
+    history.add_turn(user_message, "".join(parts))
+
+
+def show_response(system_prompt: str, history: ChatHistory, user_message: str, stream: bool) -> None:
+    """Get a response and render it, streaming token by token if requested."""
+    if stream:
+        stats = {}
+        render_stream(console, timed_stream(chat_stream(system_prompt, history, user_message, stats), stats))
+        console.print(f"[dim]{format_stream_stats(stats)}[/dim]")
+    else:
+        response = chat(system_prompt, history, user_message)
+        print_response(console, response)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Chat with a governance AI assistant (OpenAI)")
     parser.add_argument("query", nargs="?", help="Single query (omit for interactive mode)")
     parser.add_argument("--prompt", default="system_prompt", help="Which system prompt to use (default: system_prompt)")
+    parser.add_argument("--stream", action="store_true", help="Render responses as they are generated")
     args = parser.parse_args()
 
     if not OPENAI_API_KEY:
@@ -56,15 +105,14 @@ def main():
         sys.exit(1)
 
     system_prompt = load_system_prompt(args.prompt)
-    messages = []
+    history = ChatHistory(summarize)
 
     console.print(f"\n[bold]Governance AI — OpenAI ({args.prompt})[/bold]")
     console.print("[dim]Training AIs to discover love as the best way to survive and flourish[/dim]\n")
 
     if args.query:
         # Single query mode
-        response = chat(system_prompt, messages, args.query)
-        console.print(Panel(Markdown(response), title="Governance AI", border_style="green"))
+        show_response(system_prompt, history, args.query, args.stream)
     else:
         # Interactive mode
         console.print("[dim]Type 'quit' to exit.[/dim]\n")
@@ -80,14 +128,15 @@ def main():
                 continue
 
             try:
-                response = chat(system_prompt, messages, user_input)
                 console.print()
-                console.print(Panel(Markdown(response), title="Governance AI", border_style="green"))
+                show_response(system_prompt, history, user_input, args.stream)
                 console.print()
             except Exception as e:
                 console.print(f"[red]Error: {e}[/red]\n")
 
-    console.print("\n[dim]Session ended.[/dim]")
+    history.close()
+    console.print(f"\n[dim]Token usage: {usage_tracker.summary()}[/dim]")
+    console.print("[dim]Session ended.[/dim]")
 
 
 if __name__ == "__main__":
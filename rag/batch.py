@@ -0,0 +1,261 @@
+"""Asynchronous batch submission for bulk LLM workloads.
+
+Nightly evaluation and dataset generation send thousands of independent
+requests. Batch APIs process them asynchronously at a discount, without
+client-side rate limiting. run_batch() serializes requests into the provider's
+batch format, submits them (split into batches of BATCH_MAX_REQUESTS), polls
+every BATCH_POLL_INTERVAL seconds, and maps results back to the caller's
+request ids.
+
+Backends:
+    anthropic  Message Batches API (client.messages.batches)
+    openai     Batch API over an uploaded JSONL file of chat completions
+    others     LocalMessageBatches, an in-process stand-in with the same
+               create/retrieve/results interface as the Anthropic endpoints.
+               It answers each request with the provider's normal completion
+               call, so batch mode also works with ollama and stub.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable
+
+import resources
+from config import BATCH_LOCAL_CONCURRENCY, BATCH_MAX_REQUESTS, BATCH_POLL_INTERVAL
+from prompt_cache import usage_tracker
+from providers import AnthropicProvider, OpenAIProvider, Provider, get_provider
+from tracing import span
+
+
+class LocalMessageBatches:
+    """In-process stand-in for the Anthropic Message Batches endpoints.
+
+    Requests are answered in the background by `provider` with up to
+    `concurrency` calls at once. The objects returned mirror the SDK shapes that
+    MessageBatchBackend reads.
+    """
+
+    def __init__(self, provider: Provider, concurrency: int = BATCH_LOCAL_CONCURRENCY):
+        self.provider = provider
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="local-batch")
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def create(self, requests: list[dict]):
+        batch = {"futures": {}}
+        for request in requests:
+            params = request["params"]
+            system = "".join(block["text"] for block in params.get("system", []))
+            batch["futures"][request["custom_id"]] = self._pool.submit(
+                self.provider.complete, system or None, params["messages"][-1]["content"], params["max_tokens"])
+        with self._lock:
+            batch_id = f"localbatch_{len(self._batches) + 1:06d}"
+            self._batches[batch_id] = batch
+        return self.retrieve(batch_id)
+
+    def close(self) -> None:
+        """Stop the worker threads, cancelling requests that have not started."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def retrieve(self, batch_id: str):
+        futures = self._batches[batch_id]["futures"].values()
+        done = [future for future in futures if future.done()]
+        errored = sum(1 for future in done if future.exception() is not None)
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended" if len(done) == len(futures) else "in_progress",
+            request_counts=SimpleNamespace(processing=len(futures) - len(done), succeeded=len(done) - errored,
+                                           errored=errored, canceled=0, expired=0),
+        )
+
+    def results(self, batch_id: str):
+        for custom_id, future in self._batches[batch_id]["futures"].items():
+            error = future.exception()
+            if error is None:
+                # Usage was already recorded by the provider call itself
+                message = SimpleNamespace(content=[SimpleNamespace(type="text", text=future.result())], usage=None)
+                result = SimpleNamespace(type="succeeded", message=message)
+            else:
+                result = SimpleNamespace(type="errored", error=str(error))
+            yield SimpleNamespace(custom_id=custom_id, result=result)
+
+
+class BatchBackend:
+    """Submit one batch, poll it, and read back its results."""
+
+    def submit(self, requests: list[tuple[str, dict]]) -> str:
+        """Submit (custom_id, request) pairs and return the batch id."""
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> tuple[bool, int]:
+        """Return whether the batch has finished and how many requests are done."""
+        raise NotImplementedError
+
+    def results(self, batch_id: str):
+        """Yield (custom_id, text, error) for every request in a finished batch."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release anything the backend holds; batches already submitted to a provider are unaffected."""
+
+
+class MessageBatchBackend(BatchBackend):
+    """Anthropic Message Batches, or the local stand-in with the same interface."""
+
+    def __init__(self, batches, provider: AnthropicProvider, usage_provider: str = "anthropic"):
+        self.batches = batches
+        self.provider = provider
+        self.usage_provider = usage_provider
+
+    def submit(self, requests: list[tuple[str, dict]]) -> str:
+        batch = self.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": self.provider.request_params(request.get("system"), request["user_message"],
+                                                       request["max_tokens"]),
+            }
+            for custom_id, request in requests
+        ])
+        return batch.id
+
+    def poll(self, batch_id: str) -> tuple[bool, int]:
+        batch = self.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        finished = counts.succeeded + counts.errored + counts.canceled + counts.expired
+        return batch.processing_status == "ended", finished
+
+    def results(self, batch_id: str):
+        for entry in self.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                usage_tracker.record(self.usage_provider, result.message.usage)
+                yield entry.custom_id, result.message.content[0].text, None
+            else:
+                yield entry.custom_id, None, str(getattr(result, "error", None) or result.type)
+
+    def close(self) -> None:
+        if isinstance(self.batches, LocalMessageBatches):
+            self.batches.close()
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: requests are uploaded as a JSONL file of chat completions."""
+
+    ENDPOINT = "/v1/chat/completions"
+    TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, client, provider: OpenAIProvider):
+        self.client = client
+        self.provider = provider
+
+    def submit(self, requests: list[tuple[str, dict]]) -> str:
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": self.ENDPOINT,
+                "body": self.provider.request_params(request.get("system"), request["user_message"],
+                                                     request["max_tokens"]),
+            }, ensure_ascii=False)
+            for custom_id, request in requests
+        ]
+        input_file = self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint=self.ENDPOINT,
+                                           completion_window="24h")
+        return batch.id
+
+    def poll(self, batch_id: str) -> tuple[bool, int]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        finished = (counts.completed + counts.failed) if counts else 0
+        return batch.status in self.TERMINAL, finished
+
+    def results(self, batch_id: str):
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                body = response.get("body") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    yield entry["custom_id"], None, str(entry.get("error") or body.get("error") or response)
+                    continue
+                usage = body.get("usage") or {}
+                usage_tracker.record("openai", SimpleNamespace(
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0),
+                    prompt_tokens_details=SimpleNamespace(
+                        cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)),
+                ))
+                yield entry["custom_id"], body["choices"][0]["message"]["content"], None
+
+
+def get_batch_backend(provider: str) -> BatchBackend:
+    """Batch backend for a provider; providers without a batch API use the local stand-in."""
+    if provider == "anthropic":
+        return MessageBatchBackend(resources.client("anthropic").messages.batches, get_provider("anthropic"))
+    if provider == "openai":
+        return OpenAIBatchBackend(resources.client("openai"), get_provider("openai"))
+    local = get_provider(provider)
+    return MessageBatchBackend(LocalMessageBatches(local), AnthropicProvider(local.model), usage_provider=provider)
+
+
+def run_batch(provider: str, requests: list[dict], poll_interval: float = BATCH_POLL_INTERVAL,
+              max_requests: int = BATCH_MAX_REQUESTS,
+              on_progress: Callable[[int, int], None] | None = None,
+              backend: BatchBackend | None = None) -> dict[str, dict]:
+    """Run requests through a batch API and wait for all of them.
+
+    Each request is a dict with ``id``, ``user_message``, ``max_tokens`` and an
+    optional ``system`` prompt. Returns ``{id: {"text": ...}}`` for successes and
+    ``{id: {"error": ...}}`` for failures. `on_progress` is called after each
+    poll with (finished, total). A backend created here is closed before
+    returning; one passed in is left to the caller.
+    """
+    owned = backend is None
+    backend = backend or get_batch_backend(provider)
+    try:
+        with span("batch.run", provider=provider, requests=len(requests)) as current:
+            outcomes = _run_batch(backend, requests, poll_interval, max_requests, on_progress)
+            current.set(errors=sum(1 for outcome in outcomes.values() if "error" in outcome))
+    finally:
+        if owned:
+            backend.close()
+    return outcomes
+
+
+def _run_batch(backend: BatchBackend, requests: list[dict], poll_interval: float, max_requests: int,
+               on_progress: Callable[[int, int], None] | None) -> dict[str, dict]:
+    # Custom ids are positional: providers restrict their length and characters
+    pending = {}
+    for start in range(0, len(requests), max_requests):
+        chunk = [(f"req-{start + j}", request) for j, request in enumerate(requests[start:start + max_requests])]
+        pending[backend.submit(chunk)] = 0
+
+    outcomes = {}
+    while pending:
+        for batch_id in list(pending):
+            done, finished = backend.poll(batch_id)
+            pending[batch_id] = finished
+            if not done:
+                continue
+            for custom_id, text, error in backend.results(batch_id):
+                request = requests[int(custom_id.split("-", 1)[1])]
+                outcomes[request["id"]] = {"text": text} if error is None else {"error": error}
+            del pending[batch_id]
+
+        if on_progress:
+            on_progress(len(outcomes) + sum(pending.values()), len(requests))
+        if pending:
+            time.sleep(poll_interval)
+
+    for request in requests:
+        outcomes.setdefault(request["id"], {"error": "No result returned by the batch"})
+    return outcomes
@@ -0,0 +1,145 @@
+"""Persistent BM25 index for lexical retrieval over paper chunks.
+
+Dense retrieval misses exact-term queries about the paper's own vocabulary
+("syntropy", "Realms GOS", "exit rights") and needs an embedding call per
+query. This index is built at ingest time over the same chunks and works fully
+offline.
+
+Postings are stored in compressed-sparse-row form in ``bm25.npz``: for term id
+``t``, ``doc_ids[term_offsets[t]:term_offsets[t + 1]]`` are the chunks that
+contain it and ``term_freqs`` holds the matching counts. ``vocab.json`` maps
+terms to ids and ``chunks.jsonl`` holds the chunk texts and metadata.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from vector_index import top_k
+
+BM25_DIRNAME = "bm25"
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def bm25_dir(persist_dir: Path) -> Path:
+    """Directory holding the BM25 index inside a vector store directory."""
+    return Path(persist_dir) / BM25_DIRNAME
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Writer:
+    """Build a BM25 index one batch of chunks at a time.
+
+    Chunk texts are streamed to ``chunks.jsonl`` as they arrive; only the
+    postings, as compact integer arrays, are kept until close().
+    """
+
+    def __init__(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.vocab = {}
+        self.n_docs = 0
+        self._postings = []
+        self._doc_lengths = []
+        self._chunks = open(path / "chunks.jsonl", "w", encoding="utf-8")
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        term_ids, doc_ids, freqs = [], [], []
+        for text in texts:
+            counts = Counter(tokenize(text))
+            self._doc_lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(self.n_docs)
+                freqs.append(freq)
+            self.n_docs += 1
+        self._postings.append((np.array(term_ids, dtype=np.int64), np.array(doc_ids, dtype=np.int32),
+                               np.array(freqs, dtype=np.int32)))
+
+        for cid, text, metadata in zip(ids, texts, metadatas):
+            self._chunks.write(json.dumps({"id": cid, "content": text, "metadata": metadata},
+                                          ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._chunks.close()
+        if self._postings:
+            term_ids, doc_ids, freqs = (np.concatenate(arrays) for arrays in zip(*self._postings))
+        else:
+            term_ids, doc_ids, freqs = (np.empty(0, dtype=dtype) for dtype in (np.int64, np.int32, np.int32))
+        order = np.lexsort((doc_ids, term_ids))
+        term_ids = term_ids[order]
+        np.savez_compressed(
+            self.path / "bm25.npz",
+            term_offsets=np.searchsorted(term_ids, np.arange(len(self.vocab) + 1)).astype(np.int64),
+            doc_ids=doc_ids[order],
+            term_freqs=freqs[order],
+            doc_lengths=np.array(self._doc_lengths, dtype=np.int32),
+        )
+        with open(self.path / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+
+def write_bm25_index(path: Path, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+    """Build and persist a BM25 index over chunks in one go."""
+    writer = BM25Writer(path)
+    writer.add(ids, texts, metadatas)
+    writer.close()
+
+
+class BM25Index:
+    """Read-only BM25 index loaded from disk."""
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        arrays = np.load(path / "bm25.npz")
+        self.term_offsets = arrays["term_offsets"]
+        self.doc_ids = arrays["doc_ids"]
+        self.term_freqs = arrays["term_freqs"].astype(np.float32)
+        self.doc_lengths = arrays["doc_lengths"].astype(np.float32)
+        self.n_docs = len(self.doc_lengths)
+        self.avg_length = float(self.doc_lengths.mean()) if self.n_docs else 0.0
+
+        with open(path / "vocab.json", "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with open(path / "chunks.jsonl", "r", encoding="utf-8") as f:
+            self.chunks = [json.loads(line) for line in f]
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for a query."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            df = end - start
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> list[dict]:
+        """Return the k best-matching chunks, as retrieve() result dicts."""
+        if not self.n_docs:
+            return []
+        scores = self.scores(query)
+        best = top_k(scores, min(k, int(np.count_nonzero(scores))))
+        return [
+            {
+                "content": self.chunks[doc]["content"],
+                "metadata": self.chunks[doc]["metadata"],
+                "score": float(scores[doc]),
+            }
+            for doc in best
+        ]
@@ -0,0 +1,141 @@
+"""Bounded multi-turn chat history for the example chat clients.
+
+The last CHAT_KEEP_TURNS user/assistant turns are sent verbatim. Older turns
+are folded into a running summary by a background thread, so the summary
+request never delays a reply. Until a summary is ready, the evicted turns are
+still sent verbatim. A hard ceiling of CHAT_HISTORY_MAX_TOKENS drops the oldest
+of them if a request would be too large. Each request's size therefore stops
+growing after the first few turns.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from config import CHAT_HISTORY_MAX_TOKENS, CHAT_KEEP_TURNS
+from tokens import count_tokens
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a governance AI assistant.
+
+Keep the user's goals, context and open questions, the key recommendations given, and any decisions or commitments. Be concise; write at most a few short paragraphs.
+
+<current_summary>
+{summary}
+</current_summary>
+
+<new_turns>
+{turns}
+</new_turns>
+
+Respond with ONLY the updated summary."""
+
+SUMMARY_PREFIX = "Summary of our conversation so far:\n\n"
+SUMMARY_ACK = "Understood. I'll keep that context in mind."
+
+
+def message_tokens(message: dict) -> int:
+    """Approximate tokens for one chat message, including per-message overhead."""
+    return count_tokens(message["content"]) + 4
+
+
+class ChatHistory:
+    """Chat history with verbatim recent turns, a background summary and a token ceiling.
+
+    `summarize` takes a prompt and returns the model's completion. It is called
+    from a worker thread.
+    """
+
+    def __init__(self, summarize: Callable[[str], str], keep_turns: int = CHAT_KEEP_TURNS,
+                 max_tokens: int = CHAT_HISTORY_MAX_TOKENS):
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self.turns = []  # Recent (user, assistant) message pairs, sent verbatim
+        self.pending = []  # Evicted turns that have not been folded into the summary yet
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+        self._future = None
+
+    def add_turn(self, user_message: str, assistant_message: str) -> None:
+        """Record a completed turn and start summarizing any turns that fell out of the window."""
+        turn = (
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": assistant_message},
+        )
+        with self._lock:
+            self.turns.append(turn)
+            while len(self.turns) > self.keep_turns:
+                self.pending.append(self.turns.pop(0))
+        self._schedule_summary()
+
+    def messages(self, user_message: str) -> list[dict]:
+        """Messages to send for a new user message, within the token ceiling."""
+        with self._lock:
+            summary = self.summary
+            turns = self.pending + self.turns
+
+        prefix = []
+        if summary:
+            prefix = [
+                {"role": "user", "content": SUMMARY_PREFIX + summary},
+                {"role": "assistant", "content": SUMMARY_ACK},
+            ]
+        current = {"role": "user", "content": user_message}
+
+        # Keep the newest turns that fit; the summary and the new message always go
+        used = sum(message_tokens(message) for message in prefix) + message_tokens(current)
+        kept = []
+        for turn in reversed(turns):
+            tokens = sum(message_tokens(message) for message in turn)
+            if self.max_tokens > 0 and used + tokens > self.max_tokens:
+                break
+            kept.append(turn)
+            used += tokens
+
+        messages = list(prefix)
+        for turn in reversed(kept):
+            messages.extend(turn)
+        messages.append(current)
+        return messages
+
+    def token_count(self, user_message: str = "") -> int:
+        """Approximate size of the next request's messages."""
+        return sum(message_tokens(message) for message in self.messages(user_message))
+
+    def wait(self) -> None:
+        """Block until any background summarization has finished."""
+        future = self._future
+        if future is not None:
+            future.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_summary(self) -> None:
+        with self._lock:
+            if not self.pending or (self._future is not None and not self._future.done()):
+                return
+            self._future = self._executor.submit(self._fold_pending)
+
+    def _fold_pending(self) -> None:
+        """Fold the currently pending turns into the summary (runs on the worker thread)."""
+        with self._lock:
+            batch = list(self.pending)
+            summary = self.summary
+        if not batch:
+            return
+
+        turns = "\n\n".join(f"{message['role']}: {message['content']}" for turn in batch for message in turn)
+        try:
+            new_summary = self.summarize(SUMMARY_PROMPT.format(summary=summary or "(none)", turns=turns)).strip()
+        except Exception:
+            return  # Keep the turns pending; the next turn retries and the ceiling still applies
+
+        with self._lock:
+            self.summary = new_summary
+            del self.pending[:len(batch)]
+            more = bool(self.pending)
+        if more:
+            self._future = None
+            self._schedule_summary()
@@ -15,8 +15,13 @@ PROMPTS_PATH = PROJECT_ROOT / "prompts"
 
 # Embedding
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")  # "openai", or "stub" for offline hash embeddings
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))  # chunks embedded and written per batch
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))  # processes loading and chunking files, 0 = one per CPU
+EMBEDDING_CACHE_PATH = Path(os.getenv("EMBEDDING_CACHE_PATH", str(PROJECT_ROOT / "data" / "embedding_cache.sqlite3")))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))  # 0 disables the cache
 
 # LLM
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
@@ -24,5 +29,58 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
+# Client-side rate limits per provider (0 = unlimited)
+ANTHROPIC_RPM = int(os.getenv("ANTHROPIC_RPM", "0"))
+ANTHROPIC_TPM = int(os.getenv("ANTHROPIC_TPM", "0"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "governance-ai")  # built by ollama/build.sh
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))  # context window; Ollama's default truncates RAG prompts
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # how long Ollama keeps the model loaded
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))  # seconds per request
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0"))  # seconds before the stub provider answers
+
+# Example chat clients: recent turns sent verbatim and a hard ceiling on history tokens
+CHAT_KEEP_TURNS = int(os.getenv("CHAT_KEEP_TURNS", "6"))
+CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "8000"))  # 0 = no limit
+
 # Retrieval
 TOP_K = int(os.getenv("TOP_K", "5"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))  # 0 = no limit
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")  # "dense", "lexical" or "hybrid"
+RRF_K = int(os.getenv("RRF_K", "60"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" or "numpy"
+VECTOR_INDEX_LISTS = int(os.getenv("VECTOR_INDEX_LISTS", "0"))  # IVF clusters for the numpy backend, 0 = exact
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+
+# Batch mode for bulk evaluation and generation
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))  # seconds between status checks
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10000"))  # requests per submitted batch
+BATCH_LOCAL_CONCURRENCY = int(os.getenv("BATCH_LOCAL_CONCURRENCY", "4"))  # parallel calls in the local stand-in
+
+# Eval pre-screen (eval/prescreen.py): local red-line rules and a classifier trained on past judge verdicts
+PRESCREEN_MODEL_PATH = Path(os.getenv("PRESCREEN_MODEL_PATH", str(PROJECT_ROOT / "data" / "prescreen_model.npz")))
+PRESCREEN_CONFIDENCE = float(os.getenv("PRESCREEN_CONFIDENCE", "0.95"))  # classifier probability to trust
+PRESCREEN_CALIBRATION_RATE = float(os.getenv("PRESCREEN_CALIBRATION_RATE", "0.1"))  # confident items judged anyway
+
+# Columnar store of evaluation runs (eval/store.py), one Parquet file per run
+EVAL_RUNS_DIR = Path(os.getenv("EVAL_RUNS_DIR", str(PROJECT_ROOT / "data" / "eval_runs")))
+
+# HTTP server
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_PROVIDER = os.getenv("SERVER_PROVIDER", "anthropic")
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "16"))  # requests processed at once
+SERVER_QUEUE_TIMEOUT = float(os.getenv("SERVER_QUEUE_TIMEOUT", "30"))  # seconds to wait for a slot before 503
+
+# Tracing: "jsonl" or "otlp" writes every span to TRACE_PATH; empty disables export
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_PATH = Path(os.getenv("TRACE_PATH", str(PROJECT_ROOT / "data" / "traces.jsonl")))
+
+# Response cache ("memory", "sqlite" or "none")
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = Path(os.getenv("RESPONSE_CACHE_PATH", str(PROJECT_ROOT / "data" / "response_cache.sqlite3")))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "86400"))  # seconds, 0 = never expire
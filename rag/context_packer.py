@@ -0,0 +1,82 @@
+"""Token-budgeted packing of retrieved chunks into the LLM context.
+
+Adjacent chunks from the same source share CHUNK_OVERLAP characters, so
+sending both repeats that text. The packer merges such runs into a single
+passage, drops exact duplicates, and then fills a token budget greedily by
+relevance.
+"""
+
+from config import CONTEXT_TOKEN_BUDGET
+from tokens import count_tokens
+
+
+def overlap_length(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    for size in range(min(len(left), len(right)), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_adjacent(results: list[dict]) -> list[dict]:
+    """Merge results that are consecutive chunks of the same source file.
+
+    Merged passages keep the first chunk's metadata, list every chunk they
+    cover in ``metadata["chunk_indices"]`` and take the best score of the run.
+    """
+    by_source = {}
+    seen = set()
+    for result in results:
+        metadata = result["metadata"]
+        key = (metadata.get("source", "unknown"), metadata.get("chunk_index", 0))
+        if key in seen:
+            continue
+        seen.add(key)
+        by_source.setdefault(key[0], []).append(result)
+
+    merged = []
+    for chunks in by_source.values():
+        chunks.sort(key=lambda result: result["metadata"].get("chunk_index", 0))
+        current = None
+        for result in chunks:
+            index = result["metadata"].get("chunk_index", 0)
+            if current is not None and index == current["metadata"]["chunk_indices"][-1] + 1:
+                overlap = overlap_length(current["content"], result["content"])
+                current["content"] += ("" if overlap else "\n") + result["content"][overlap:]
+                current["metadata"]["chunk_indices"].append(index)
+                current["score"] = max(current["score"], result["score"])
+                continue
+            if current is not None:
+                merged.append(current)
+            current = {
+                **result,
+                "metadata": {**result["metadata"], "chunk_indices": [index]},
+            }
+        merged.append(current)
+
+    return merged
+
+
+def pack_context(results: list[dict], max_tokens: int = CONTEXT_TOKEN_BUDGET) -> tuple[list[dict], dict]:
+    """De-duplicate and budget retrieved chunks.
+
+    Returns the packed results, ordered by relevance, and a stats dict with
+    ``tokens_before``, ``tokens_after`` and ``tokens_saved``. A max_tokens of 0
+    or less disables the budget but still merges overlapping chunks.
+    """
+    tokens_before = sum(count_tokens(result["content"]) for result in results)
+
+    packed = []
+    used = 0
+    for result in sorted(merge_adjacent(results), key=lambda result: result["score"], reverse=True):
+        tokens = count_tokens(result["content"])
+        if max_tokens > 0 and used + tokens > max_tokens:
+            continue  # A smaller, less relevant passage may still fit
+        packed.append(result)
+        used += tokens
+
+    return packed, {
+        "tokens_before": tokens_before,
+        "tokens_after": used,
+        "tokens_saved": tokens_before - used,
+    }
@@ -0,0 +1,207 @@
+"""Persistent on-disk cache for text embeddings.
+
+Embeddings are keyed by (model, sha256(text)) and stored as float32 blobs in a
+small SQLite database, so re-ingesting unchanged chunks or re-embedding a
+repeated query costs no API calls. The cache is bounded in size and evicts the
+least recently used vectors first; the stored byte total is kept as a running
+counter, so only puts that overflow the bound pay for a scan.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from config import EMBEDDING_CACHE_MAX_MB, EMBEDDING_CACHE_PATH, EMBEDDING_MODEL, EMBEDDING_PROVIDER, OPENAI_API_KEY
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access);
+"""
+
+
+def text_hash(text: str) -> str:
+    """Return the cache key digest for a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Size-bounded LRU store of float32 embedding vectors backed by SQLite."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        # Hits commit a last_access update, which WAL keeps cheap
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        """Look up vectors for texts, returning None for each miss."""
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = list(set(hashes[start:start + 500]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+        return [
+            np.frombuffer(found[h], dtype=np.float32).tolist() if h in found else None
+            for h in hashes
+        ]
+
+    def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> None:
+        """Store vectors for texts and evict old entries if over the size bound."""
+        now = time.time()
+        # Keyed by hash so a text repeated in one call is counted once
+        blobs = {
+            text_hash(text): np.asarray(vector, dtype=np.float32).tobytes()
+            for text, vector in zip(texts, vectors)
+        }
+        hashes = list(blobs)
+        with self._lock:
+            replaced = 0
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                replaced += self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+                    f" WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                [(model, h, blob, now) for h, blob in blobs.items()],
+            )
+            self._bytes += sum(len(blob) for blob in blobs.values()) - replaced
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used vectors until the cache fits in max_bytes."""
+        excess = self._bytes - self.max_bytes
+        cursor = self._conn.execute("SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_access")
+        doomed = []
+        freed = 0
+        for rowid, size in cursor:
+            doomed.append((rowid,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", doomed)
+        self._bytes -= freed
+
+    def stats(self) -> dict:
+        """Return entry count and stored bytes."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        return {"entries": count, "bytes": size}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, underlying: Embeddings, model: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model = model
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.cache.get_many(self.model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # Embed each distinct missing text once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            fresh = dict(zip(unique_texts, self.underlying.embed_documents(unique_texts)))
+            self.cache.put_many(self.model, unique_texts, [fresh[text] for text in unique_texts])
+            for i in missing:
+                vectors[i] = fresh[texts[i]]
+
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = self.cache.get_many(self.model, [text])[0]
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many(self.model, [text], [vector])
+        return vector
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide embedding cache, or None if caching is disabled."""
+    global _cache
+    if EMBEDDING_CACHE_MAX_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+
+def get_embeddings() -> Embeddings:
+    """Build the embedding function used by ingestion and retrieval."""
+    if EMBEDDING_PROVIDER == "stub":
+        from stubs import StubEmbeddings
+
+        # Cheap to compute and not comparable with real vectors, so never cached
+        return StubEmbeddings()
+
+    embeddings = OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        openai_api_key=OPENAI_API_KEY,
+    )
+
+    cache = get_embedding_cache()
+    if cache is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, EMBEDDING_MODEL, cache)
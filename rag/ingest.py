@@ -1,113 +1,490 @@
 """Ingest paper content into a vector store for RAG retrieval."""
 
 import argparse
+import hashlib
+import json
+import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from rich.console import Console
 
-from config import CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_MODEL, OPENAI_API_KEY, PAPER_PATH, VECTORSTORE_PATH
+from config import (CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, INGEST_WORKERS, PAPER_PATH,
+                    VECTOR_BACKEND, VECTOR_INDEX_LISTS, VECTORSTORE_PATH)
+from bm25 import BM25Writer, bm25_dir
+from retrieve import chunk_id
+from vector_index import IndexWriter, index_dir, write_index
+
+if TYPE_CHECKING:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
 
 console = Console()
 
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+_splitters = {}
 
-def load_paper_documents(paper_path: Path) -> list[dict]:
-    """Load all markdown files from the paper source directory."""
-    documents = []
-    md_files = sorted(paper_path.rglob("*.md"))
 
+def paper_files(paper_path: Path) -> list[Path]:
+    """All markdown files under the paper source directory, in a stable order."""
+    md_files = sorted(paper_path.rglob("*.md"))
     if not md_files:
         console.print(f"[red]No markdown files found in {paper_path}[/red]")
         sys.exit(1)
+    return md_files
+
+
+def read_paper_file(md_file: Path, paper_path: Path) -> dict | None:
+    """Load one markdown file as a document, or None if it is empty."""
+    relative_path = md_file.relative_to(paper_path)
+    content = md_file.read_text(encoding="utf-8")
+    if not content.strip():
+        return None
+    return {
+        "content": content,
+        "metadata": {
+            "source": str(relative_path),
+            "filename": md_file.name,
+            "section": relative_path.parent.name or "root",
+        },
+    }
 
-    for md_file in md_files:
-        relative_path = md_file.relative_to(paper_path)
-        content = md_file.read_text(encoding="utf-8")
-        if content.strip():
-            documents.append({
-                "content": content,
-                "metadata": {
-                    "source": str(relative_path),
-                    "filename": md_file.name,
-                    "section": relative_path.parent.name or "root",
-                },
-            })
-            console.print(f"  [dim]Loaded {relative_path}[/dim]")
+
+def load_paper_documents(paper_path: Path) -> list[dict]:
+    """Load all markdown files from the paper source directory."""
+    documents = []
+    for md_file in paper_files(paper_path):
+        doc = read_paper_file(md_file, paper_path)
+        if doc is not None:
+            documents.append(doc)
+            console.print(f"  [dim]Loaded {doc['metadata']['source']}[/dim]")
 
     return documents
 
 
-def chunk_documents(documents: list[dict], chunk_size: int, chunk_overlap: int) -> tuple[list[str], list[dict]]:
-    """Split documents into chunks for embedding."""
-    splitter = RecursiveCharacterTextSplitter(
+def make_splitter(chunk_size: int, chunk_overlap: int) -> "RecursiveCharacterTextSplitter":
+    """Build the text splitter used for all paper chunking."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=["\n## ", "\n### ", "\n#### ", "\n\n", "\n", " ", ""],
     )
 
+
+def chunk_document(doc: dict, splitter: "RecursiveCharacterTextSplitter") -> tuple[list[str], list[dict]]:
+    """Split a single document into chunks with positional metadata."""
+    chunks = splitter.split_text(doc["content"])
+    metadatas = [
+        {
+            **doc["metadata"],
+            "chunk_index": i,
+            "chunk_total": len(chunks),
+        }
+        for i in range(len(chunks))
+    ]
+    return chunks, metadatas
+
+
+def chunk_documents(documents: list[dict], chunk_size: int, chunk_overlap: int) -> tuple[list[str], list[dict]]:
+    """Split documents into chunks for embedding."""
+    splitter = make_splitter(chunk_size, chunk_overlap)
+
     all_texts = []
     all_metadatas = []
 
     for doc in documents:
-        chunks = splitter.split_text(doc["content"])
-        for i, chunk in enumerate(chunks):
-            all_texts.append(chunk)
-            all_metadatas.append({
-                **doc["metadata"],
-                "chunk_index": i,
-                "chunk_total": len(chunks),
-            })
+        texts, metadatas = chunk_document(doc, splitter)
+        all_texts.extend(texts)
+        all_metadatas.extend(metadatas)
 
     return all_texts, all_metadatas
 
 
-def create_vectorstore(texts: list[str], metadatas: list[dict], persist_dir: Path) -> Chroma:
-    """Create and persist a Chroma vector store."""
+def content_hash(text: str) -> str:
+    """Return a stable hex digest of a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(persist_dir: Path) -> dict:
+    """Load the ingestion manifest stored next to the vector store, if any."""
+    manifest_file = persist_dir / MANIFEST_FILENAME
+    if not manifest_file.exists():
+        return {}
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(persist_dir: Path, manifest: dict) -> None:
+    """Write the ingestion manifest atomically."""
     persist_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = persist_dir / MANIFEST_FILENAME
+    tmp_file = manifest_file.with_suffix(".json.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    tmp_file.replace(manifest_file)
+
 
-    embeddings = OpenAIEmbeddings(
-        model=EMBEDDING_MODEL,
-        openai_api_key=OPENAI_API_KEY,
+def delete_manifest(persist_dir: Path) -> None:
+    """Remove the manifest, so an interrupted rebuild leaves none describing chunks that are gone."""
+    (persist_dir / MANIFEST_FILENAME).unlink(missing_ok=True)
+
+
+def new_manifest(chunk_size: int, chunk_overlap: int) -> dict:
+    """Create an empty manifest for the given ingestion settings."""
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding_model": EMBEDDING_MODEL,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "files": {},
+    }
+
+
+def manifest_matches(manifest: dict, chunk_size: int, chunk_overlap: int) -> bool:
+    """Check whether a manifest was produced with the same ingestion settings."""
+    return (
+        manifest.get("version") == MANIFEST_VERSION
+        and manifest.get("embedding_model") == EMBEDDING_MODEL
+        and manifest.get("chunk_size") == chunk_size
+        and manifest.get("chunk_overlap") == chunk_overlap
     )
 
-    vectorstore = Chroma.from_texts(
-        texts=texts,
-        metadatas=metadatas,
-        embedding=embeddings,
+
+def open_vectorstore(persist_dir: Path) -> "Chroma":
+    """Open (or create) the persisted Chroma collection for writing."""
+    from langchain_community.vectorstores import Chroma
+
+    from embedding_cache import get_embeddings
+
+    persist_dir.mkdir(parents=True, exist_ok=True)
+
+    return Chroma(
         persist_directory=str(persist_dir),
+        embedding_function=get_embeddings(),
         collection_name="paper_content",
     )
 
+
+def create_vectorstore(texts: list[str], metadatas: list[dict], persist_dir: Path) -> "Chroma":
+    """Create and persist a Chroma vector store, replacing any existing collection."""
+    vectorstore = open_vectorstore(persist_dir)
+    vectorstore.delete_collection()
+    vectorstore = open_vectorstore(persist_dir)
+
+    if texts:
+        vectorstore.add_texts(
+            texts=texts,
+            metadatas=metadatas,
+            ids=[chunk_id(metadata) for metadata in metadatas],
+        )
+
     return vectorstore
 
 
+def create_vector_index(texts: list[str], metadatas: list[dict], persist_dir: Path, n_lists: int = 0):
+    """Embed chunks and write the built-in NumPy vector index.
+
+    Returns the embedding function used, so callers can report cache usage.
+    """
+    from embedding_cache import get_embeddings
+
+    embeddings = get_embeddings()
+    vectors = embeddings.embed_documents(texts) if texts else []
+    write_index(index_dir(persist_dir), [chunk_id(metadata) for metadata in metadatas], texts, metadatas,
+                vectors, n_lists)
+    return embeddings
+
+
+def cached_splitter(chunk_size: int, chunk_overlap: int) -> "RecursiveCharacterTextSplitter":
+    """Splitter shared by every file a process chunks."""
+    key = (chunk_size, chunk_overlap)
+    if key not in _splitters:
+        _splitters[key] = make_splitter(chunk_size, chunk_overlap)
+    return _splitters[key]
+
+
+def chunk_file(md_file: Path, paper_path: Path, chunk_size: int, chunk_overlap: int) -> dict | None:
+    """Load and split one file; runs in an ingestion worker process.
+
+    Returns the file's ``source``, content ``hash``, chunk ``texts`` and
+    ``metadatas``, or None if the file is empty.
+    """
+    doc = read_paper_file(md_file, paper_path)
+    if doc is None:
+        return None
+    texts, metadatas = chunk_document(doc, cached_splitter(chunk_size, chunk_overlap))
+    return {"source": doc["metadata"]["source"], "hash": content_hash(doc["content"]),
+            "texts": texts, "metadatas": metadatas}
+
+
+def iter_chunked_files(paper_path: Path, chunk_size: int, chunk_overlap: int, workers: int = INGEST_WORKERS):
+    """Yield chunk_file() results in path order, loading and splitting files on a process pool.
+
+    At most ``4 * workers`` files are in flight, so memory is bounded by that
+    window rather than by the corpus, and workers keep splitting while the
+    consumer embeds earlier chunks. ``workers`` of 0 means one per CPU; with a
+    single worker files are chunked in this process.
+    """
+    md_files = paper_files(paper_path)
+    workers = min(workers or os.cpu_count() or 1, len(md_files))
+    if workers <= 1:
+        for md_file in md_files:
+            result = chunk_file(md_file, paper_path, chunk_size, chunk_overlap)
+            if result is not None:
+                yield result
+        return
+
+    # Build the splitter (and import langchain) once here, so forked workers inherit it
+    cached_splitter(chunk_size, chunk_overlap)
+    with ProcessPoolExecutor(workers) as pool:
+        files = iter(md_files)
+        pending = deque()
+
+        def submit_next() -> None:
+            md_file = next(files, None)
+            if md_file is not None:
+                pending.append(pool.submit(chunk_file, md_file, paper_path, chunk_size, chunk_overlap))
+
+        for _ in range(4 * workers):
+            submit_next()
+        try:
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                if result is not None:
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class BatchWriter:
+    """Group chunks into batches and embed and store each batch on a background thread.
+
+    ``write(ids, texts, metadatas)`` handles one batch. One batch is written
+    while the next one fills, so embedding I/O overlaps with chunking and at
+    most two batches are held in memory.
+    """
+
+    def __init__(self, write: Callable[[list[str], list[str], list[dict]], None], batch_size: int):
+        self.write = write
+        self.batch_size = max(batch_size, 1)
+        self.written = 0
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="ingest-write")
+        self._pending = None
+        self._batch = ([], [], [])
+
+    def add(self, cid: str, text: str, metadata: dict) -> None:
+        for column, value in zip(self._batch, (cid, text, metadata)):
+            column.append(value)
+        if len(self._batch[0]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the current batch to the writer thread, after the previous one finishes."""
+        if not self._batch[0]:
+            return
+        self._wait()
+        self._pending = self._pool.submit(self.write, *self._batch)
+        self._batch = ([], [], [])
+
+    def _wait(self) -> None:
+        if self._pending is not None:
+            self.written += len(self._pending.result())  # re-raises a failed write
+            self._pending = None
+
+    def close(self) -> None:
+        self.flush()
+        self._wait()
+        self._pool.shutdown()
+
+
+def ingest(paper_path: Path, persist_dir: Path, backend: str, chunk_size: int, chunk_overlap: int,
+           incremental: bool = False, n_lists: int = 0, workers: int = INGEST_WORKERS,
+           batch_size: int = EMBEDDING_BATCH_SIZE, on_progress: Callable[[dict], None] | None = None) -> dict:
+    """Stream the paper through chunking, embedding and the vector and BM25 indexes.
+
+    Files are loaded and split on a process pool (iter_chunked_files) and
+    chunks are embedded and written in batches of ``batch_size`` as they
+    arrive (BatchWriter). The BM25 index covers every chunk. The NumPy index
+    is rewritten as a whole; unchanged chunks come from the embedding cache.
+    Chroma is rebuilt unless ``incremental``, in which case only new or
+    changed chunks are embedded and chunks whose source is gone are removed,
+    based on the manifest from the previous run.
+
+    Returns counts (files, chunks, added, updated, removed, skipped, stored,
+    cache_hits, cache_misses); the cache counts stay 0 when embeddings are not
+    cached.
+    """
+    stats = {"files": 0, "chunks": 0, "added": 0, "updated": 0, "removed": 0, "skipped": 0}
+    previous_files = {}
+    delete_ids, refresh_ids, refresh_metadatas = [], [], []
+
+    if backend == "numpy":
+        from embedding_cache import get_embeddings
+
+        embeddings = get_embeddings()
+        index = IndexWriter(index_dir(persist_dir))
+
+        def write(ids: list[str], texts: list[str], metadatas: list[dict]) -> list[str]:
+            index.add(ids, texts, metadatas, embeddings.embed_documents(texts))
+            return ids
+    else:
+        vectorstore = open_vectorstore(persist_dir)
+        previous = load_manifest(persist_dir) if incremental else {}
+        if previous and not manifest_matches(previous, chunk_size, chunk_overlap):
+            console.print("[yellow]Ingestion settings changed since last run — rebuilding collection[/yellow]")
+            stats["removed"] = sum(len(entry["chunks"]) for entry in previous["files"].values())
+            previous = {}
+        if not previous:
+            # The manifest is rewritten only once every batch is stored
+            delete_manifest(persist_dir)
+            vectorstore.delete_collection()
+            vectorstore = open_vectorstore(persist_dir)
+        previous_files = previous.get("files", {})
+        embeddings = vectorstore.embeddings
+
+        def write(ids: list[str], texts: list[str], metadatas: list[dict]) -> list[str]:
+            vectorstore.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+            return ids
+
+    manifest = new_manifest(chunk_size, chunk_overlap)
+    bm25 = BM25Writer(bm25_dir(persist_dir))
+    writer = BatchWriter(write, batch_size)
+    try:
+        for chunked in iter_chunked_files(paper_path, chunk_size, chunk_overlap, workers):
+            source = chunked["source"]
+            ids = [chunk_id(metadata) for metadata in chunked["metadatas"]]
+            bm25.add(ids, chunked["texts"], chunked["metadatas"])
+            stats["files"] += 1
+            stats["chunks"] += len(ids)
+
+            prev_entry = previous_files.get(source)
+            if prev_entry and prev_entry["hash"] == chunked["hash"]:
+                manifest["files"][source] = prev_entry
+                stats["skipped"] += len(prev_entry["chunks"])
+                continue
+
+            prev_chunks = prev_entry["chunks"] if prev_entry else {}
+            entry = {"hash": chunked["hash"], "chunks": {}}
+            for cid, text, metadata in zip(ids, chunked["texts"], chunked["metadatas"]):
+                text_hash = content_hash(text)
+                entry["chunks"][cid] = text_hash
+                if cid not in prev_chunks:
+                    stats["added"] += 1
+                elif prev_chunks[cid] != text_hash:
+                    stats["updated"] += 1
+                else:
+                    # Unchanged text; its metadata is refreshed in case e.g. chunk_total moved
+                    stats["skipped"] += 1
+                    refresh_ids.append(cid)
+                    refresh_metadatas.append(metadata)
+                    continue
+                writer.add(cid, text, metadata)
+
+            stale = [cid for cid in prev_chunks if cid not in entry["chunks"]]
+            delete_ids.extend(stale)
+            stats["removed"] += len(stale)
+            manifest["files"][source] = entry
+            if on_progress:
+                on_progress({**stats, "embedded": writer.written})
+    finally:
+        writer.close()
+
+    for source, prev_entry in previous_files.items():
+        if source not in manifest["files"]:
+            delete_ids.extend(prev_entry["chunks"])
+            stats["removed"] += len(prev_entry["chunks"])
+
+    bm25.close()
+    if backend == "numpy":
+        index.close(n_lists)
+        stats["stored"] = index.count
+    else:
+        if delete_ids:
+            vectorstore.delete(ids=delete_ids)
+        if refresh_ids:
+            vectorstore._collection.update(ids=refresh_ids, metadatas=refresh_metadatas)
+        save_manifest(persist_dir, manifest)
+        stats["stored"] = vectorstore._collection.count()
+
+    # CachedEmbeddings counts lookups; other embedding functions have no cache
+    stats["cache_hits"] = getattr(embeddings, "hits", 0)
+    stats["cache_misses"] = getattr(embeddings, "misses", 0)
+    return stats
+
+
+def print_ingest_stats(stats: dict) -> None:
+    """Print a summary of incremental ingestion work."""
+    from rich.table import Table
+
+    table = Table(title="Incremental Ingestion")
+    table.add_column("Chunks", style="bold")
+    table.add_column("Count", justify="right")
+    for key in ("added", "updated", "removed", "skipped"):
+        table.add_row(key.capitalize(), str(stats[key]))
+    console.print(table)
+
+    embedded = stats["added"] + stats["updated"]
+    total = embedded + stats["skipped"]
+    if total:
+        console.print(f"[dim]Embedded {embedded}/{total} chunks ({100 * stats['skipped'] / total:.0f}% reused)[/dim]\n")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Ingest paper content into vector store")
     parser.add_argument("--paper-path", type=Path, default=PAPER_PATH, help="Path to paper source directory")
     parser.add_argument("--output", type=Path, default=VECTORSTORE_PATH, help="Path to vector store output")
     parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Chunk size for splitting")
     parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP, help="Chunk overlap for splitting")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed new or changed chunks, using the manifest from the previous run "
+                             "(chroma only; the numpy index is always rebuilt)")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=VECTOR_BACKEND,
+                        help=f"Vector store backend to write (default: {VECTOR_BACKEND})")
+    parser.add_argument("--ivf-lists", type=int, default=VECTOR_INDEX_LISTS,
+                        help="IVF clusters for the numpy backend (0 = exact search)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Processes for loading and chunking files (0 = one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE,
+                        help="Chunks embedded and written per batch")
     args = parser.parse_args()
 
     console.print("\n[bold]Governance AI — Paper Ingestion[/bold]\n")
 
-    # Load documents
-    console.print(f"[blue]Loading documents from {args.paper_path}...[/blue]")
-    documents = load_paper_documents(args.paper_path)
-    console.print(f"[green]Loaded {len(documents)} documents[/green]\n")
+    incremental = args.incremental and args.backend == "chroma"
+    if args.incremental and not incremental:
+        console.print("[yellow]--incremental only applies to chroma: the numpy index is always rebuilt, "
+                      "with unchanged chunks served from the embedding cache[/yellow]")
+    target = index_dir(args.output) if args.backend == "numpy" else args.output
+    action = "Updating" if incremental else "Writing"
+    console.print(f"[blue]{action} {args.backend} index at {target} from {args.paper_path} "
+                  f"(size={args.chunk_size}, overlap={args.chunk_overlap}, batch={args.batch_size})...[/blue]")
+
+    with console.status("Chunking and embedding...") as status:
+        def progress(stats: dict) -> None:
+            status.update(f"Chunked {stats['files']} files into {stats['chunks']} chunks · "
+                          f"{stats['embedded']} embedded")
+
+        stats = ingest(args.paper_path, args.output, args.backend, args.chunk_size, args.chunk_overlap,
+                       incremental, args.ivf_lists, args.workers, args.batch_size, progress)
 
-    # Chunk documents
-    console.print(f"[blue]Chunking documents (size={args.chunk_size}, overlap={args.chunk_overlap})...[/blue]")
-    texts, metadatas = chunk_documents(documents, args.chunk_size, args.chunk_overlap)
-    console.print(f"[green]Created {len(texts)} chunks[/green]\n")
+    console.print(f"[green]Chunked {stats['files']} documents into {stats['chunks']} chunks[/green]\n")
+    if incremental:
+        print_ingest_stats(stats)
+    console.print(f"[green]Vector {'index' if args.backend == 'numpy' else 'store'} holds "
+                  f"{stats['stored']} embeddings[/green]")
+    console.print(f"[green]BM25 index created over {stats['chunks']} chunks[/green]\n")
 
-    # Create vector store
-    console.print(f"[blue]Creating vector store at {args.output}...[/blue]")
-    vectorstore = create_vectorstore(texts, metadatas, args.output)
-    console.print(f"[green]Vector store created with {vectorstore._collection.count()} embeddings[/green]\n")
+    if stats["cache_hits"] or stats["cache_misses"]:
+        console.print(f"[dim]Embedding cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses[/dim]\n")
 
     console.print("[bold green]Ingestion complete![/bold green]")
 
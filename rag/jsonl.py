@@ -0,0 +1,35 @@
+"""Append-safe JSONL files shared by the eval results and dataset generation writers."""
+
+import os
+from pathlib import Path
+
+_TAIL_CHUNK = 64 * 1024
+
+
+def truncate_partial_line(path: Path) -> int:
+    """Cut a partial last line (e.g. from a crash mid-write) so appended records start on a fresh line.
+
+    Returns the number of bytes removed.
+    """
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(end - _TAIL_CHUNK, 0)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+        return size - end
+
+
+def open_jsonl(path: Path, append: bool = False):
+    """Open a JSONL file for writing; in append mode, drop a partial last line first."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if append and path.exists():
+        truncate_partial_line(path)
+    return open(path, "a" if append else "w", encoding="utf-8")
@@ -5,74 +5,164 @@ import sys
 from pathlib import Path
 
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
 
-from config import ANTHROPIC_API_KEY, ANTHROPIC_MODEL, OPENAI_API_KEY, OPENAI_MODEL, PROMPTS_PATH
+from config import CONTEXT_TOKEN_BUDGET, PROMPTS_PATH, RESPONSE_CACHE_BACKEND, VECTORSTORE_PATH
+from context_packer import pack_context
+from prompt_cache import usage_tracker
+from providers import PROVIDERS, get_provider
+from response_cache import ResponseCache, cached_call, create_response_cache, make_cache_key
 from retrieve import format_context, retrieve
+from streaming import format_stream_stats, print_response, render_stream, timed_stream
+from tracing import StageProfile, enable_profiling, span, traced
 
 console = Console()
 
 
-def load_system_prompt() -> str:
-    """Load the main system prompt."""
+@traced()
+def read_system_prompt() -> str:
+    """Read the main system prompt, raising FileNotFoundError if it is missing."""
     prompt_file = PROMPTS_PATH / "system_prompt.md"
     if not prompt_file.exists():
-        console.print(f"[red]System prompt not found at {prompt_file}[/red]")
-        sys.exit(1)
+        raise FileNotFoundError(f"System prompt not found at {prompt_file}")
     return prompt_file.read_text(encoding="utf-8")
 
 
-def build_rag_prompt(query: str, context: str, system_prompt: str) -> tuple[str, str]:
-    """Build the system and user messages for the RAG query."""
-    system = system_prompt + "\n\n## Grounding Context\n\nThe following excerpts from the Smart Social Contracts paper are relevant to the user's question. Use them to ground your response in the paper's specific arguments and terminology. Cite the source sections when relevant.\n\n" + context
-
-    return system, query
-
-
-def query_anthropic(system: str, user_message: str) -> str:
-    """Query the Anthropic API."""
-    import anthropic
-
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=ANTHROPIC_MODEL,
-        max_tokens=4096,
-        system=system,
-        messages=[{"role": "user", "content": user_message}],
-    )
-    return response.content[0].text
-
+def load_system_prompt() -> str:
+    """Load the main system prompt, exiting if it is missing."""
+    try:
+        return read_system_prompt()
+    except FileNotFoundError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
 
-def query_openai(system: str, user_message: str) -> str:
-    """Query the OpenAI API."""
-    from openai import OpenAI
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        max_tokens=4096,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user_message},
-        ],
-    )
-    return response.choices[0].message.content
+@traced()
+def build_rag_prompt(query: str, context: str, system_prompt: str) -> tuple[str, str]:
+    """Build the system and user messages for the RAG query.
+
+    The system message is identical for every query so providers can cache it;
+    the per-query paper excerpts travel with the question in the user message.
+    """
+    system = system_prompt + "\n\n## Grounding Context\n\nEach user message begins with excerpts from the Smart Social Contracts paper that are relevant to the user's question. Use them to ground your response in the paper's specific arguments and terminology. Cite the source sections when relevant."
+
+    user_message = f"<paper_excerpts>\n{context}\n</paper_excerpts>\n\n{query}"
+
+    return system, user_message
+
+
+def prepare_query(query: str, system_prompt: str, provider: str, top_k: int, max_context_tokens: int,
+                  stats: dict, persist_dir: Path = VECTORSTORE_PATH) -> tuple[str, str, str, list[dict]]:
+    """Retrieve and pack context, then build the messages and response cache key.
+
+    Records ``retrieved`` and the context packing token counts in `stats`.
+    Returns (system, user_message, cache_key, packed_results).
+    """
+    results = retrieve(query, top_k=top_k, persist_dir=persist_dir)
+    with span("pack_context", budget=max_context_tokens) as current:
+        packed, packing = pack_context(results, max_context_tokens)
+        current.set(**packing)
+    stats["retrieved"] = len(results)
+    stats.update(packing)
+
+    system, user_message = build_rag_prompt(query, format_context(packed), system_prompt)
+    key = make_cache_key(provider, get_provider(provider).model, system_prompt,
+                         [result["content"] for result in packed], query)
+    return system, user_message, key, packed
+
+
+def answer(query: str, system_prompt: str, provider: str, top_k: int,
+           cache: ResponseCache | None = None, max_context_tokens: int = CONTEXT_TOKEN_BUDGET,
+           stats: dict | None = None, persist_dir: Path = VECTORSTORE_PATH) -> tuple[str, list[dict]]:
+    """Retrieve context for a query and generate a grounded response.
+
+    If a `stats` dict is given it is filled with ``retrieved`` and the context
+    packing ``tokens_before``/``tokens_after``/``tokens_saved`` counts.
+
+    Returns the response text and the chunks sent as context.
+    """
+    stats = {} if stats is None else stats
+    with span("answer", provider=provider, model=get_provider(provider).model, top_k=top_k):
+        system, user_message, key, packed = prepare_query(query, system_prompt, provider, top_k,
+                                                          max_context_tokens, stats, persist_dir)
+        response = cached_call(cache, key, lambda: get_provider(provider).complete(system, user_message))
+    return response, packed
+
+
+def stream_query(query: str, system_prompt: str, provider: str, top_k: int,
+                 cache: ResponseCache | None = None, stats: dict | None = None,
+                 max_context_tokens: int = CONTEXT_TOKEN_BUDGET):
+    """Retrieve context for a query and stream the grounded response as text chunks.
+
+    If a `stats` dict is given it is filled as by answer(), plus ``cached``,
+    ``ttft``, ``duration``, ``output_tokens`` and ``tokens_per_sec``.
+    Cached responses are yielded as a single chunk.
+    """
+    stats = {} if stats is None else stats
+    with span("answer", provider=provider, model=get_provider(provider).model, top_k=top_k,
+              stream=True) as current:
+        system, user_message, key, _ = prepare_query(query, system_prompt, provider, top_k,
+                                                     max_context_tokens, stats)
+        cached = cache.get(key) if cache is not None else None
+        stats["cached"] = cached is not None
+        current.set(cache_hit=stats["cached"])
+        if cached is not None:
+            yield from timed_stream([cached], stats)
+            return
+
+        parts = []
+        with span("llm.stream", provider=provider) as llm:
+            for chunk in timed_stream(get_provider(provider).stream(system, user_message, stats), stats):
+                parts.append(chunk)
+                yield chunk
+            llm.set(ttft_ms=round((stats["ttft"] or 0) * 1000, 1), output_tokens=stats["output_tokens"])
+
+        if cache is not None:
+            cache.set(key, "".join(parts))
+
+
+def format_context_stats(stats: dict) -> str:
+    """One-line summary of retrieval and context packing."""
+    return (f"Retrieved {stats['retrieved']} chunks · context {stats['tokens_after']} tokens "
+            f"({stats['tokens_saved']} saved by packing)")
+
+
+def print_cache_stats(cache: ResponseCache | None) -> None:
+    """Print response cache counters and provider token usage for the run."""
+    if cache is not None:
+        stats = cache.stats()
+        console.print(f"[dim]Response cache: {stats['hits']} hits, {stats['misses']} misses[/dim]")
+    console.print(f"[dim]Token usage: {usage_tracker.summary()}[/dim]")
+
+
+def print_profile(profile: StageProfile | None) -> None:
+    """Print the stage timings of the last answer when profiling."""
+    if profile is not None:
+        console.print(profile.trace_table())
 
 
 def main():
     parser = argparse.ArgumentParser(description="Query the governance AI with RAG grounding")
     parser.add_argument("query", nargs="?", help="The question to ask")
-    parser.add_argument("--provider", choices=["anthropic", "openai"], default="anthropic", help="LLM provider")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default="anthropic",
+                        help="LLM provider (ollama runs locally; stub answers offline, for testing)")
     parser.add_argument("--top-k", type=int, default=5, help="Number of context chunks to retrieve")
     parser.add_argument("--interactive", action="store_true", help="Interactive chat mode")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite"], default=None,
+                        help=f"Response cache backend (default: {RESPONSE_CACHE_BACKEND})")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the LLM, bypassing the response cache")
+    parser.add_argument("--stream", action="store_true", help="Render the response as it is generated")
+    parser.add_argument("--context-tokens", type=int, default=CONTEXT_TOKEN_BUDGET,
+                        help="Token budget for retrieved context (0 = no limit)")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage latency breakdown after each answer")
     args = parser.parse_args()
 
+    profile = enable_profiling() if args.profile else None
+
     console.print("\n[bold]Governance AI — RAG Pipeline[/bold]\n")
 
     system_prompt = load_system_prompt()
 
-    query_fn = query_anthropic if args.provider == "anthropic" else query_openai
+    cache = None if args.no_cache else create_response_cache(args.cache_backend or RESPONSE_CACHE_BACKEND)
 
     if args.interactive:
         console.print("[dim]Interactive mode. Type 'quit' to exit.[/dim]\n")
@@ -86,42 +176,48 @@ def main():
             if not query.strip():
                 continue
 
-            # Retrieve context
-            results = retrieve(query, top_k=args.top_k)
-            context = format_context(results)
-
-            # Build prompt and query
-            system, user_message = build_rag_prompt(query, context, system_prompt)
             try:
-                response = query_fn(system, user_message)
                 console.print()
-                console.print(Panel(Markdown(response), title="Governance AI", border_style="green"))
+                stats = {}
+                if args.stream:
+                    render_stream(console, stream_query(query, system_prompt, args.provider, args.top_k, cache,
+                                                        stats, args.context_tokens))
+                    console.print(f"[dim]{format_context_stats(stats)} · {format_stream_stats(stats)}[/dim]")
+                else:
+                    response, _ = answer(query, system_prompt, args.provider, args.top_k, cache,
+                                         args.context_tokens, stats)
+                    print_response(console, response)
+                    console.print(f"[dim]{format_context_stats(stats)}[/dim]")
+                print_profile(profile)
                 console.print()
             except Exception as e:
                 console.print(f"[red]Error: {e}[/red]\n")
+
+        print_cache_stats(cache)
     else:
         if not args.query:
             console.print("[red]Please provide a query or use --interactive mode[/red]")
             sys.exit(1)
 
-        # Retrieve context
-        console.print(f"[blue]Retrieving context for:[/blue] {args.query}\n")
-        results = retrieve(args.query, top_k=args.top_k)
-        context = format_context(results)
-
-        console.print(f"[dim]Retrieved {len(results)} relevant chunks[/dim]\n")
-
-        # Build prompt and query
-        system, user_message = build_rag_prompt(args.query, context, system_prompt)
-
-        console.print(f"[blue]Querying {args.provider}...[/blue]\n")
+        console.print(f"[blue]Retrieving context and querying {args.provider} for:[/blue] {args.query}\n")
         try:
-            response = query_fn(system, user_message)
-            console.print(Panel(Markdown(response), title="Governance AI", border_style="green"))
+            stats = {}
+            if args.stream:
+                render_stream(console, stream_query(args.query, system_prompt, args.provider, args.top_k, cache,
+                                                    stats, args.context_tokens))
+                console.print(f"[dim]{format_context_stats(stats)} · {format_stream_stats(stats)}[/dim]")
+            else:
+                response, _ = answer(args.query, system_prompt, args.provider, args.top_k, cache,
+                                     args.context_tokens, stats)
+                console.print(f"[dim]{format_context_stats(stats)}[/dim]\n")
+                print_response(console, response)
+            print_profile(profile)
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
             sys.exit(1)
 
+        print_cache_stats(cache)
+
 
 if __name__ == "__main__":
     main()
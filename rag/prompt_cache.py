@@ -0,0 +1,69 @@
+"""Provider-side prompt caching for the static parts of a request.
+
+The system prompt and the judge rubric are identical on every call, so they
+are sent first. For Anthropic they are also marked with an ephemeral
+``cache_control`` breakpoint. OpenAI caches the longest repeated prompt prefix
+automatically, so it only needs the static text first. Retrieved context and
+the user query always come after the static prefix.
+
+Cache reads and writes are reported in each response's ``usage``.
+UsageTracker adds them up for the whole run.
+"""
+
+import threading
+
+from tracing import current_span
+
+
+def cacheable_system(text: str) -> list[dict]:
+    """Anthropic system blocks with a cache breakpoint after the static text."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+class UsageTracker:
+    """Thread-safe totals of input, output and cached tokens across requests."""
+
+    FIELDS = ("requests", "input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, provider: str, usage) -> None:
+        """Add one response's usage object (Anthropic or OpenAI shape)."""
+        if usage is None:
+            return
+
+        if provider == "anthropic":
+            cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+            cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+            # Anthropic reports uncached input separately from cache reads/writes
+            input_tokens = (getattr(usage, "input_tokens", 0) or 0) + cache_read + cache_write
+            output_tokens = getattr(usage, "output_tokens", 0) or 0
+        else:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cache_read = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+            # OpenAI writes its prefix cache implicitly and does not report it
+            cache_write = 0
+            input_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            output_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+        current_span().set(input_tokens=input_tokens, output_tokens=output_tokens, cache_read_tokens=cache_read)
+        with self._lock:
+            self.totals["requests"] += 1
+            self.totals["input_tokens"] += input_tokens
+            self.totals["output_tokens"] += output_tokens
+            self.totals["cache_read_tokens"] += cache_read
+            self.totals["cache_write_tokens"] += cache_write
+
+    def summary(self) -> str:
+        """One-line report of token usage and prompt cache effectiveness."""
+        totals = dict(self.totals)
+        input_tokens = totals["input_tokens"]
+        hit_rate = 100 * totals["cache_read_tokens"] / input_tokens if input_tokens else 0
+        return (f"{totals['requests']} requests · {input_tokens} input tokens "
+                f"({totals['cache_read_tokens']} cache read, {totals['cache_write_tokens']} cache write, "
+                f"{hit_rate:.0f}% cached) · {totals['output_tokens']} output tokens")
+
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,290 @@
+"""LLM providers behind one interface.
+
+The pipeline, the HTTP server, evaluation and dataset generation all talk to
+models through a Provider, so adding a backend or changing how requests are
+built, rate limited and metered happens in one place. Each provider offers
+blocking and asyncio variants of a single-turn completion and of a streamed
+completion. Streams yield text deltas and put ``output_tokens`` into the
+caller's stats dict once the provider reports it.
+
+Available providers: anthropic, openai, ollama (a local Ollama server, e.g.
+the governance-ai model built by ollama/build.sh) and stub (offline echo).
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import resources
+from config import ANTHROPIC_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_MODEL, OLLAMA_NUM_CTX, OPENAI_MODEL
+from prompt_cache import cacheable_system, usage_tracker
+from ratelimit import estimate_tokens, rate_limited_call
+from tracing import span
+
+DEFAULT_MAX_TOKENS = 4096
+
+
+class Provider:
+    """Base interface: single-turn completions with an optional system prompt."""
+
+    name = ""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def complete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """Return the full response, waiting for the provider's rate limit and retrying transient errors."""
+        tokens = estimate_tokens(system or "", user_message) + max_tokens
+        with span("llm.complete", provider=self.name, model=self.model, max_tokens=max_tokens):
+            return rate_limited_call(self.name, tokens, lambda: self._complete(system, user_message, max_tokens))
+
+    def stream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        """Yield the response as text deltas."""
+        raise NotImplementedError
+
+    async def acomplete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """Async variant of complete(), without client-side rate limiting."""
+        raise NotImplementedError
+
+    def astream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        """Async variant of stream(), returning an async iterator of text deltas."""
+        raise NotImplementedError
+
+    def _complete(self, system: str | None, user_message: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+
+class AnthropicProvider(Provider):
+    """Anthropic Messages API; the system prompt is marked for prompt caching."""
+
+    name = "anthropic"
+
+    def request_params(self, system: str | None, user_message: str, max_tokens: int) -> dict:
+        """Messages API parameters, as used directly and in message batches."""
+        request = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": user_message}],
+        }
+        if system:
+            request["system"] = cacheable_system(system)
+        return request
+
+    def _complete(self, system: str | None, user_message: str, max_tokens: int) -> str:
+        response = resources.client(self.name).messages.create(
+            **self.request_params(system, user_message, max_tokens))
+        usage_tracker.record(self.name, response.usage)
+        return response.content[0].text
+
+    def stream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        with resources.client(self.name).messages.stream(
+                **self.request_params(system, user_message, max_tokens)) as stream:
+            yield from stream.text_stream
+            usage = stream.get_final_message().usage
+            usage_tracker.record(self.name, usage)
+            stats["output_tokens"] = usage.output_tokens
+
+    async def acomplete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        response = await resources.async_client(self.name).messages.create(
+            **self.request_params(system, user_message, max_tokens))
+        usage_tracker.record(self.name, response.usage)
+        return response.content[0].text
+
+    async def astream(self, system: str | None, user_message: str, stats: dict,
+                      max_tokens: int = DEFAULT_MAX_TOKENS):
+        async with resources.async_client(self.name).messages.stream(
+                **self.request_params(system, user_message, max_tokens)) as stream:
+            async for text in stream.text_stream:
+                yield text
+            usage = (await stream.get_final_message()).usage
+            usage_tracker.record(self.name, usage)
+            stats["output_tokens"] = usage.output_tokens
+
+
+class OpenAIProvider(Provider):
+    """OpenAI Chat Completions API; repeated prompt prefixes are cached automatically."""
+
+    name = "openai"
+
+    def request_params(self, system: str | None, user_message: str, max_tokens: int) -> dict:
+        """Chat Completions parameters, as used directly and in batch files."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": user_message})
+        return {"model": self.model, "max_tokens": max_tokens, "messages": messages}
+
+    def _complete(self, system: str | None, user_message: str, max_tokens: int) -> str:
+        response = resources.client(self.name).chat.completions.create(
+            **self.request_params(system, user_message, max_tokens))
+        usage_tracker.record(self.name, response.usage)
+        return response.choices[0].message.content
+
+    def _delta(self, chunk, stats: dict) -> str | None:
+        if chunk.usage:
+            usage_tracker.record(self.name, chunk.usage)
+            stats["output_tokens"] = chunk.usage.completion_tokens
+        if chunk.choices and chunk.choices[0].delta.content:
+            return chunk.choices[0].delta.content
+        return None
+
+    def stream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        stream = resources.client(self.name).chat.completions.create(
+            **self.request_params(system, user_message, max_tokens),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            text = self._delta(chunk, stats)
+            if text:
+                yield text
+
+    async def acomplete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        response = await resources.async_client(self.name).chat.completions.create(
+            **self.request_params(system, user_message, max_tokens))
+        usage_tracker.record(self.name, response.usage)
+        return response.choices[0].message.content
+
+    async def astream(self, system: str | None, user_message: str, stats: dict,
+                      max_tokens: int = DEFAULT_MAX_TOKENS):
+        stream = await resources.async_client(self.name).chat.completions.create(
+            **self.request_params(system, user_message, max_tokens),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            text = self._delta(chunk, stats)
+            if text:
+                yield text
+
+
+class OllamaProvider(Provider):
+    """Local Ollama server via its /api/chat endpoint.
+
+    Requests go through a shared keep-alive HTTP connection pool, and
+    ``keep_alive`` asks Ollama to keep the model loaded between requests.
+    ``num_ctx`` sets the context window, which Ollama otherwise limits to a
+    small default that would truncate retrieved context.
+    """
+
+    name = "ollama"
+
+    def __init__(self, model: str, num_ctx: int = OLLAMA_NUM_CTX, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        super().__init__(model)
+        self.num_ctx = num_ctx
+        self.keep_alive = keep_alive
+
+    def _request(self, system: str | None, user_message: str, max_tokens: int, stream: bool) -> dict:
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": user_message})
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {"num_ctx": self.num_ctx, "num_predict": max_tokens},
+        }
+
+    def _record(self, data: dict, stats: dict | None = None) -> None:
+        """Record usage from the final response object."""
+        usage = SimpleNamespace(prompt_tokens=data.get("prompt_eval_count", 0),
+                                completion_tokens=data.get("eval_count", 0))
+        usage_tracker.record(self.name, usage)
+        if stats is not None:
+            stats["output_tokens"] = usage.completion_tokens
+
+    def _delta(self, line: str, stats: dict) -> str:
+        data = json.loads(line)
+        if "error" in data:
+            raise RuntimeError(f"Ollama error: {data['error']}")
+        if data.get("done"):
+            self._record(data, stats)
+        return data.get("message", {}).get("content", "")
+
+    def _complete(self, system: str | None, user_message: str, max_tokens: int) -> str:
+        response = resources.client(self.name).post(
+            "/api/chat", json=self._request(system, user_message, max_tokens, stream=False))
+        response.raise_for_status()
+        data = response.json()
+        self._record(data)
+        return data["message"]["content"]
+
+    def stream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        with resources.client(self.name).stream(
+                "POST", "/api/chat", json=self._request(system, user_message, max_tokens, stream=True)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    text = self._delta(line, stats)
+                    if text:
+                        yield text
+
+    async def acomplete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        response = await resources.async_client(self.name).post(
+            "/api/chat", json=self._request(system, user_message, max_tokens, stream=False))
+        response.raise_for_status()
+        data = response.json()
+        self._record(data)
+        return data["message"]["content"]
+
+    async def astream(self, system: str | None, user_message: str, stats: dict,
+                      max_tokens: int = DEFAULT_MAX_TOKENS):
+        async with resources.async_client(self.name).stream(
+                "POST", "/api/chat", json=self._request(system, user_message, max_tokens, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    text = self._delta(line, stats)
+                    if text:
+                        yield text
+
+
+class StubProvider(Provider):
+    """Offline provider that echoes the question (see stubs.py, imported on first use)."""
+
+    name = "stub"
+
+    def _complete(self, system: str | None, user_message: str, max_tokens: int) -> str:
+        from stubs import query_stub
+
+        return query_stub(system, user_message)
+
+    def stream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        from stubs import stream_stub
+
+        return stream_stub(system, user_message, stats)
+
+    async def acomplete(self, system: str | None, user_message: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        from stubs import aquery_stub
+
+        return await aquery_stub(system, user_message)
+
+    def astream(self, system: str | None, user_message: str, stats: dict, max_tokens: int = DEFAULT_MAX_TOKENS):
+        from stubs import astream_stub
+
+        return astream_stub(system, user_message, stats)
+
+
+def _stub_provider() -> StubProvider:
+    from stubs import STUB_MODEL
+
+    return StubProvider(STUB_MODEL)
+
+
+PROVIDERS = {
+    "anthropic": lambda: AnthropicProvider(ANTHROPIC_MODEL),
+    "openai": lambda: OpenAIProvider(OPENAI_MODEL),
+    "ollama": lambda: OllamaProvider(OLLAMA_MODEL),
+    "stub": _stub_provider,
+}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Provider:
+    """Return the shared provider instance for a name in PROVIDERS."""
+    with _providers_lock:
+        if name not in _providers:
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown provider: {name}")
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
@@ -0,0 +1,134 @@
+"""Client-side rate limiting and retry for LLM provider calls.
+
+Each provider gets a process-wide limiter with two token buckets, one for
+requests per minute and one for tokens per minute, so concurrent workers stay
+under the account limits instead of tripping 429s. Calls that still fail
+with a rate-limit or server error are retried with jittered exponential backoff.
+"""
+
+import random
+import threading
+import time
+
+from config import ANTHROPIC_RPM, ANTHROPIC_TPM, LLM_MAX_RETRIES, OPENAI_RPM, OPENAI_TPM
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+DEFAULT_LIMITS = {
+    "anthropic": (ANTHROPIC_RPM, ANTHROPIC_TPM),
+    "openai": (OPENAI_RPM, OPENAI_TPM),
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate.
+
+    A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until `amount` tokens are available, returning the time waited."""
+        if self.per_minute <= 0:
+            return 0.0
+
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_minute / 60)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) * 60 / self.per_minute
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one provider."""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int) -> float:
+        """Block until one request carrying `tokens` tokens may be sent."""
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Return the shared limiter for a provider, built from config on first use."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(*DEFAULT_LIMITS.get(provider, (0, 0)))
+        return _limiters[provider]
+
+
+def configure_rate_limiter(provider: str, requests_per_minute: float | None = None,
+                           tokens_per_minute: float | None = None) -> RateLimiter:
+    """Replace a provider's limiter, e.g. from command-line overrides.
+
+    Limits left as None keep the configured default.
+    """
+    default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (0, 0))
+    limiter = RateLimiter(
+        default_rpm if requests_per_minute is None else requests_per_minute,
+        default_tpm if tokens_per_minute is None else tokens_per_minute,
+    )
+    with _limiters_lock:
+        _limiters[provider] = limiter
+    return limiter
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Cheap token estimate (~4 characters per token) for rate limiting."""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an SDK or HTTP error is a rate limit, timeout, or transient server failure."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        # httpx errors (Ollama) carry the status on their response
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Connection errors and timeouts carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout",
+                                    "RemoteProtocolError")
+
+
+def retry_with_backoff(fn, max_retries: int = LLM_MAX_RETRIES, base_delay: float = 1.0, max_delay: float = 60.0):
+    """Call fn(), retrying retryable errors with full-jitter exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+def rate_limited_call(provider: str, tokens: int, fn):
+    """Wait for the provider's rate limit, then call fn() with retries."""
+    limiter = get_rate_limiter(provider)
+
+    def attempt():
+        limiter.acquire(tokens)
+        return fn()
+
+    return retry_with_backoff(attempt)
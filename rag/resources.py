@@ -0,0 +1,175 @@
+"""Process-wide, lazily initialized handles shared across queries.
+
+Opening the Chroma store or constructing an SDK client is expensive (disk
+access, embedding setup, TLS handshakes), so callers should fetch them from
+here instead of building new ones per query. All accessors are thread-safe.
+"""
+
+import atexit
+import threading
+from pathlib import Path
+
+from config import ANTHROPIC_API_KEY, OLLAMA_HOST, OLLAMA_TIMEOUT, OPENAI_API_KEY, VECTORSTORE_PATH
+
+_lock = threading.RLock()
+_vectorstores = {}
+_vector_indexes = {}
+_bm25_indexes = {}
+_clients = {}
+_async_clients = {}
+
+
+def vectorstore(persist_dir: Path = VECTORSTORE_PATH):
+    """Return the shared vector store for a persist directory, opening it on first use."""
+    key = Path(persist_dir).resolve()
+    store = _vectorstores.get(key)
+    if store is not None:
+        return store
+
+    with _lock:
+        if key not in _vectorstores:
+            from retrieve import get_vectorstore
+
+            _vectorstores[key] = get_vectorstore(Path(persist_dir))
+        return _vectorstores[key]
+
+
+def vector_index(persist_dir: Path = VECTORSTORE_PATH):
+    """Return the shared NumPy vector index for a persist directory, loading it on first use."""
+    key = Path(persist_dir).resolve()
+    index = _vector_indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        if key not in _vector_indexes:
+            from retrieve import get_vector_index
+
+            _vector_indexes[key] = get_vector_index(Path(persist_dir))
+        return _vector_indexes[key]
+
+
+def bm25_index(persist_dir: Path = VECTORSTORE_PATH):
+    """Return the shared BM25 index for a persist directory, loading it on first use."""
+    key = Path(persist_dir).resolve()
+    index = _bm25_indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        if key not in _bm25_indexes:
+            from bm25 import BM25Index, bm25_dir
+
+            _bm25_indexes[key] = BM25Index(bm25_dir(persist_dir))
+        return _bm25_indexes[key]
+
+
+def _ollama_timeout():
+    import httpx
+
+    # Local generation can take minutes; only connecting should fail fast
+    return httpx.Timeout(OLLAMA_TIMEOUT, connect=10.0)
+
+
+def _ollama_limits():
+    import httpx
+
+    return httpx.Limits(max_keepalive_connections=32, keepalive_expiry=300.0)
+
+
+def _create_client(provider: str):
+    """Construct an SDK client for a provider."""
+    if provider == "anthropic":
+        import anthropic
+
+        return anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    if provider == "openai":
+        from openai import OpenAI
+
+        return OpenAI(api_key=OPENAI_API_KEY)
+    if provider == "ollama":
+        import httpx
+
+        return httpx.Client(base_url=OLLAMA_HOST, timeout=_ollama_timeout(), limits=_ollama_limits())
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def client(provider: str):
+    """Return the shared SDK client for a provider.
+
+    SDK clients keep a pooled HTTP connection, so reusing one avoids a new
+    TLS handshake per request. They are safe to share between threads.
+    """
+    instance = _clients.get(provider)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        if provider not in _clients:
+            _clients[provider] = _create_client(provider)
+        return _clients[provider]
+
+
+def _create_async_client(provider: str):
+    """Construct an asyncio SDK client for a provider."""
+    if provider == "anthropic":
+        import anthropic
+
+        return anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    if provider == "openai":
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=OPENAI_API_KEY)
+    if provider == "ollama":
+        import httpx
+
+        return httpx.AsyncClient(base_url=OLLAMA_HOST, timeout=_ollama_timeout(), limits=_ollama_limits())
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def async_client(provider: str):
+    """Return the shared asyncio SDK client for a provider.
+
+    Async clients are bound to the event loop that first uses them, so share
+    them only within one loop (e.g. one server process).
+    """
+    instance = _async_clients.get(provider)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        if provider not in _async_clients:
+            _async_clients[provider] = _create_async_client(provider)
+        return _async_clients[provider]
+
+
+async def aclose() -> None:
+    """Close the asyncio clients; call from the event loop that used them."""
+    with _lock:
+        instances = list(_async_clients.values())
+        _async_clients.clear()
+    for instance in instances:
+        # httpx clients close with aclose(); the SDK clients with an async close()
+        await (instance.aclose() if hasattr(instance, "aclose") else instance.close())
+
+
+def close() -> None:
+    """Close all open clients and drop cached handles."""
+    with _lock:
+        for instance in _clients.values():
+            instance.close()
+        _clients.clear()
+        _vectorstores.clear()
+        _vector_indexes.clear()
+        _bm25_indexes.clear()
+
+
+def reload() -> None:
+    """Discard current handles so the next access re-creates them.
+
+    Use after re-ingesting the paper or rotating API keys.
+    """
+    close()
+
+
+atexit.register(close)
@@ -0,0 +1,174 @@
+"""Cache for LLM responses keyed on everything that determines the answer.
+
+A cache key covers the provider, model, a hash of the system prompt, hashes of
+the retrieved chunk texts, the normalized query and the output token limit.
+Hashing chunk text rather than chunk ids means re-ingesting an edited document
+invalidates answers built from its old text. Two backends are available: an
+in-memory LRU with TTL, and a SQLite store that persists across processes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL
+from providers import DEFAULT_MAX_TOKENS
+from tracing import current_span
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(provider: str, model: str, system_prompt: str, chunks: list[str], query: str,
+                   max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """Build a cache key for one request; `chunks` are the texts sent as context."""
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "system": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+        "chunks": [hashlib.sha256(chunk.encode("utf-8")).hexdigest() for chunk in chunks],
+        "query": normalize_query(query),
+        "max_tokens": max_tokens,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Base interface for response caches, with hit/miss counters."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._set(key, value)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def _get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache whose entries expire after ttl seconds."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Persistent cache shared across runs, with the same LRU and TTL policy."""
+
+    def __init__(self, path: Path = RESPONSE_CACHE_PATH, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = RESPONSE_CACHE_TTL):
+        super().__init__()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+        """)
+        self._conn.commit()
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if self.ttl and now - stored_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+
+def create_response_cache(backend: str = RESPONSE_CACHE_BACKEND) -> ResponseCache | None:
+    """Create a response cache for a backend name ("memory", "sqlite" or "none")."""
+    if backend == "memory":
+        return MemoryResponseCache()
+    if backend == "sqlite":
+        return SQLiteResponseCache()
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+def cached_call(cache: ResponseCache | None, key: str, fn) -> str:
+    """Return the cached response for key, or call fn() and cache its result."""
+    if cache is None:
+        return fn()
+
+    value = cache.get(key)
+    current_span().set(cache_hit=value is not None)
+    if value is None:
+        value = fn()
+        cache.set(key, value)
+    return value
@@ -1,35 +1,94 @@
 """Retrieve relevant content from the vector store."""
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+import resources
+from config import RETRIEVAL_MODE, RRF_K, TOP_K, VECTOR_BACKEND, VECTORSTORE_PATH
+from tracing import span, traced
 
-from config import EMBEDDING_MODEL, OPENAI_API_KEY, TOP_K, VECTORSTORE_PATH
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
 
+    from vector_index import VectorIndex
 
-def get_vectorstore(persist_dir: Path = VECTORSTORE_PATH) -> Chroma:
+
+def chunk_id(metadata: dict) -> str:
+    """Stable vector store id for a chunk, derived from its source file and position."""
+    return f"{metadata.get('source', 'unknown')}::{metadata.get('chunk_index', 0)}"
+
+
+def get_vectorstore(persist_dir: Path = VECTORSTORE_PATH) -> "Chroma":
     """Load an existing Chroma vector store."""
-    embeddings = OpenAIEmbeddings(
-        model=EMBEDDING_MODEL,
-        openai_api_key=OPENAI_API_KEY,
-    )
+    from langchain_community.vectorstores import Chroma
+
+    from embedding_cache import get_embeddings
 
     return Chroma(
         persist_directory=str(persist_dir),
-        embedding_function=embeddings,
+        embedding_function=get_embeddings(),
         collection_name="paper_content",
     )
 
 
-def retrieve(query: str, top_k: int = TOP_K, persist_dir: Path = VECTORSTORE_PATH) -> list[dict]:
+def get_vector_index(persist_dir: Path = VECTORSTORE_PATH) -> "VectorIndex":
+    """Load an existing NumPy vector index."""
+    from embedding_cache import get_embeddings
+    from vector_index import VectorIndex, index_dir
+
+    return VectorIndex(index_dir(persist_dir), get_embeddings())
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], top_k: int, k: int = RRF_K) -> list[dict]:
+    """Merge ranked result lists by reciprocal rank fusion.
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in; the
+    fused score replaces the per-retriever score.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            cid = chunk_id(result["metadata"])
+            if cid not in fused:
+                fused[cid] = {**result, "score": 0.0}
+            fused[cid]["score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:top_k]
+
+
+def retrieve(query: str, top_k: int = TOP_K, persist_dir: Path = VECTORSTORE_PATH,
+             backend: str = VECTOR_BACKEND, mode: str = RETRIEVAL_MODE) -> list[dict]:
     """Retrieve the most relevant chunks for a query.
 
+    `mode` selects dense (embedding) retrieval, lexical BM25 retrieval, which
+    needs no network access, or a hybrid of both fused by reciprocal rank.
+
     Returns a list of dicts with 'content', 'metadata', and 'score' keys.
     """
-    vectorstore = get_vectorstore(persist_dir)
+    with span("retrieve", mode=mode, backend=backend, top_k=top_k) as current:
+        results = _retrieve(query, top_k, persist_dir, backend, mode)
+        current.set(results=len(results))
+    return results
+
+
+def _retrieve(query: str, top_k: int, persist_dir: Path, backend: str, mode: str) -> list[dict]:
+    if mode == "lexical":
+        return _bm25_search(query, top_k, persist_dir)
+    if mode == "hybrid":
+        # Over-fetch from each retriever so fusion has candidates to reorder
+        candidates = 2 * top_k
+        return reciprocal_rank_fusion([
+            _retrieve(query, candidates, persist_dir, backend, mode="dense"),
+            _bm25_search(query, candidates, persist_dir),
+        ], top_k)
+
+    if backend == "numpy":
+        return resources.vector_index(persist_dir).search(query, top_k)
 
-    results = vectorstore.similarity_search_with_relevance_scores(query, k=top_k)
+    vectorstore = resources.vectorstore(persist_dir)
+
+    with span("chroma_search", k=top_k):
+        results = vectorstore.similarity_search_with_relevance_scores(query, k=top_k)
 
     return [
         {
@@ -41,6 +100,66 @@ def retrieve(query: str, top_k: int = TOP_K, persist_dir: Path = VECTORSTORE_PAT
     ]
 
 
+def retrieve_many(queries: list[str], top_k: int = TOP_K, persist_dir: Path = VECTORSTORE_PATH,
+                  backend: str = VECTOR_BACKEND, mode: str = RETRIEVAL_MODE) -> list[list[dict]]:
+    """Retrieve the most relevant chunks for many queries at once.
+
+    Gives the same results as calling retrieve() per query, but dense
+    retrieval embeds all queries in batched requests and searches them
+    together: block matrix products on the NumPy index, one bulk query on
+    Chroma.
+
+    Returns one result list per query, in the order of `queries`.
+    """
+    with span("retrieve_many", mode=mode, backend=backend, top_k=top_k, queries=len(queries)) as current:
+        results = _retrieve_many(queries, top_k, persist_dir, backend, mode) if queries else []
+        current.set(results=sum(len(query_results) for query_results in results))
+    return results
+
+
+def _retrieve_many(queries: list[str], top_k: int, persist_dir: Path, backend: str, mode: str) -> list[list[dict]]:
+    if mode == "lexical":
+        return [_bm25_search(query, top_k, persist_dir) for query in queries]
+    if mode == "hybrid":
+        candidates = 2 * top_k
+        dense = _retrieve_many(queries, candidates, persist_dir, backend, mode="dense")
+        return [
+            reciprocal_rank_fusion([results, _bm25_search(query, candidates, persist_dir)], top_k)
+            for query, results in zip(queries, dense)
+        ]
+
+    if backend == "numpy":
+        return resources.vector_index(persist_dir).search_many(queries, top_k)
+
+    vectorstore = resources.vectorstore(persist_dir)
+
+    with span("embed_queries", queries=len(queries)):
+        vectors = vectorstore.embeddings.embed_documents(queries)
+    with span("chroma_search", k=top_k, queries=len(queries)):
+        found = vectorstore._collection.query(query_embeddings=vectors, n_results=top_k,
+                                              include=["documents", "metadatas", "distances"])
+
+    # Same distance-to-relevance conversion as similarity_search_with_relevance_scores
+    relevance = vectorstore._select_relevance_score_fn()
+    return [
+        [
+            {
+                "content": content,
+                "metadata": metadata,
+                "score": relevance(distance),
+            }
+            for content, metadata, distance in zip(documents, metadatas, distances)
+        ]
+        for documents, metadatas, distances in zip(found["documents"], found["metadatas"], found["distances"])
+    ]
+
+
+def _bm25_search(query: str, k: int, persist_dir: Path) -> list[dict]:
+    with span("bm25_search", k=k):
+        return resources.bm25_index(persist_dir).search(query, k)
+
+
+@traced()
 def format_context(results: list[dict]) -> str:
     """Format retrieved results into a context string for the LLM."""
     if not results:
@@ -0,0 +1,455 @@
+"""HTTP server for the RAG pipeline.
+
+This is a plain ASGI application, and main() runs it under uvicorn. The
+system prompt, retrieval indexes, response cache and async provider clients
+are loaded once at startup. Every request shares them. Retrieval runs in
+worker threads, and LLM calls use the providers' asyncio clients. At most
+SERVER_MAX_CONCURRENCY requests are processed at once. Other requests wait up
+to SERVER_QUEUE_TIMEOUT seconds for a slot, then get a 503.
+
+Endpoints:
+    POST /query     {"query", "provider", "top_k", "context_tokens", "stream"}
+                    Returns a grounded answer as JSON. If "stream" is true, or
+                    the client accepts text/event-stream, the answer is sent
+                    as server-sent events instead: one "context" event, then
+                    "token" events, then "done" (or "error").
+    POST /retrieve  {"query", "top_k", "mode"}
+                    Returns the retrieved chunks as JSON. With a "queries"
+                    list instead of "query", retrieves for all of them in one
+                    batch and returns one result list per query.
+    GET  /metrics   Counters in Prometheus text format.
+    GET  /health    Liveness check.
+
+To run offline, with no API keys, use stub embeddings and the stub LLM:
+    EMBEDDING_PROVIDER=stub python rag/ingest.py
+    EMBEDDING_PROVIDER=stub python rag/server.py --provider stub
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import resources
+from config import (CONTEXT_TOKEN_BUDGET, RESPONSE_CACHE_BACKEND, RETRIEVAL_MODE, SERVER_HOST, SERVER_MAX_CONCURRENCY,
+                    SERVER_PORT, SERVER_PROVIDER, SERVER_QUEUE_TIMEOUT, TOP_K, VECTOR_BACKEND, VECTORSTORE_PATH)
+from pipeline import prepare_query, read_system_prompt
+from prompt_cache import usage_tracker
+from providers import PROVIDERS, get_provider
+from response_cache import ResponseCache, create_response_cache
+from retrieve import retrieve, retrieve_many
+from streaming import atimed_stream
+from tracing import span
+
+MAX_BODY_BYTES = 1024 * 1024
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+ENDPOINTS = {"/query": "POST", "/retrieve": "POST", "/metrics": "GET", "/health": "GET"}
+
+
+class HTTPError(Exception):
+    """An error reported to the client as a JSON body with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Metrics:
+    """Request counters and latency totals, rendered in Prometheus text format.
+
+    Only the event loop thread updates them, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = defaultdict(int)  # (endpoint, status) -> count
+        self.duration_sum = defaultdict(float)
+        self.duration_count = defaultdict(int)
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.disconnects = 0
+        self.ttft_sum = 0.0
+        self.ttft_count = 0
+
+    def observe(self, endpoint: str, status: int, seconds: float) -> None:
+        self.requests[(endpoint, status)] += 1
+        self.duration_sum[endpoint] += seconds
+        self.duration_count[endpoint] += 1
+
+    def observe_ttft(self, seconds: float) -> None:
+        self.ttft_sum += seconds
+        self.ttft_count += 1
+
+    def render(self, cache: ResponseCache | None) -> str:
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        metric("rag_requests_total", "counter", "HTTP requests by endpoint and status.",
+               [(f'{{endpoint="{endpoint}",status="{status}"}}', count)
+                for (endpoint, status), count in sorted(self.requests.items())])
+        metric("rag_request_duration_seconds_sum", "counter", "Total request handling time by endpoint.",
+               [(f'{{endpoint="{endpoint}"}}', round(total, 6)) for endpoint, total in sorted(self.duration_sum.items())])
+        metric("rag_request_duration_seconds_count", "counter", "Requests timed by endpoint.",
+               [(f'{{endpoint="{endpoint}"}}', count) for endpoint, count in sorted(self.duration_count.items())])
+        metric("rag_requests_in_flight", "gauge", "Requests currently holding a concurrency slot.", [("", self.in_flight)])
+        metric("rag_requests_queued", "gauge", "Requests waiting for a concurrency slot.", [("", self.queued)])
+        metric("rag_requests_rejected_total", "counter", "Requests rejected after waiting too long for a slot.",
+               [("", self.rejected)])
+        metric("rag_stream_disconnects_total", "counter", "Streaming responses abandoned by the client.",
+               [("", self.disconnects)])
+        metric("rag_time_to_first_token_seconds_sum", "counter", "Total time to first streamed token.",
+               [("", round(self.ttft_sum, 6))])
+        metric("rag_time_to_first_token_seconds_count", "counter", "Streamed responses timed.", [("", self.ttft_count)])
+
+        if cache is not None:
+            stats = cache.stats()
+            metric("rag_response_cache_hits_total", "counter", "Response cache hits.", [("", stats["hits"])])
+            metric("rag_response_cache_misses_total", "counter", "Response cache misses.", [("", stats["misses"])])
+
+        totals = dict(usage_tracker.totals)
+        metric("rag_llm_requests_total", "counter", "LLM requests with reported usage.", [("", totals["requests"])])
+        for field in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens"):
+            metric(f"rag_llm_{field}_total", "counter", f"LLM {field.replace('_', ' ')} reported by providers.",
+                   [("", totals[field])])
+
+        metric("rag_uptime_seconds", "gauge", "Seconds since the server started.", [("", round(time.time() - self.started, 3))])
+        return "\n".join(lines) + "\n"
+
+
+def warm_up(persist_dir: Path) -> None:
+    """Open the retrieval indexes used by the configured retrieval mode."""
+    if RETRIEVAL_MODE != "dense":
+        resources.bm25_index(persist_dir)
+    if RETRIEVAL_MODE != "lexical":
+        if VECTOR_BACKEND == "numpy":
+            resources.vector_index(persist_dir)
+        else:
+            resources.vectorstore(persist_dir)
+
+
+def source_summary(result: dict) -> dict:
+    """Compact description of a chunk sent as context."""
+    metadata = result["metadata"]
+    return {
+        "source": metadata.get("source", "unknown"),
+        "chunks": metadata.get("chunk_indices", [metadata.get("chunk_index", 0)]),
+        "score": result["score"],
+    }
+
+
+async def read_json(receive) -> dict:
+    """Read and parse a JSON object request body."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, "Client disconnected")
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        more_body = message.get("more_body", False)
+
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError:
+        raise HTTPError(400, "Request body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return payload
+
+
+def query_field(body: dict) -> str:
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise HTTPError(400, "'query' must be a non-empty string")
+    return query
+
+
+def queries_field(body: dict) -> list[str]:
+    queries = body.get("queries")
+    if (not isinstance(queries, list) or not queries
+            or not all(isinstance(query, str) and query.strip() for query in queries)):
+        raise HTTPError(400, "'queries' must be a non-empty list of non-empty strings")
+    return queries
+
+
+def int_field(body: dict, name: str, default: int, minimum: int = 0) -> int:
+    value = body.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise HTTPError(400, f"'{name}' must be an integer >= {minimum}")
+    return value
+
+
+def choice_field(body: dict, name: str, default: str, choices) -> str:
+    value = body.get(name, default)
+    if value not in choices:
+        raise HTTPError(400, f"'{name}' must be one of: {', '.join(choices)}")
+    return value
+
+
+async def send_body(send, status: int, body: bytes, content_type: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status: int, payload: dict) -> None:
+    await send_body(send, status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), b"application/json")
+
+
+async def send_event(send, event: str, payload: dict) -> None:
+    data = json.dumps(payload, ensure_ascii=False)
+    await send({"type": "http.response.body", "body": f"event: {event}\ndata: {data}\n\n".encode("utf-8"),
+                "more_body": True})
+
+
+async def single_chunk(text: str):
+    yield text
+
+
+class RAGServer:
+    """ASGI application serving retrieval and grounded answers."""
+
+    def __init__(self, provider: str = SERVER_PROVIDER, max_concurrency: int = SERVER_MAX_CONCURRENCY,
+                 queue_timeout: float = SERVER_QUEUE_TIMEOUT, cache_backend: str = RESPONSE_CACHE_BACKEND,
+                 persist_dir: Path = VECTORSTORE_PATH):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.cache_backend = cache_backend
+        self.persist_dir = persist_dir
+        self.metrics = Metrics()
+        self.system_prompt = None
+        self.cache = None
+        self._slots = None
+        self._startup_lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle(scope, receive, send)
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await resources.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self) -> None:
+        """Load the shared resources once; also run lazily if the ASGI server skips lifespan."""
+        async with self._startup_lock:
+            if self._slots is not None:
+                return
+            # Raises instead of exiting, so a missing prompt fails startup or the request
+            self.system_prompt = read_system_prompt()
+            self.cache = create_response_cache(self.cache_backend)
+            await asyncio.to_thread(warm_up, self.persist_dir)
+            if self.provider != "stub":
+                resources.async_client(self.provider)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the max_concurrency processing slots, or fail with 503."""
+        self.metrics.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.rejected += 1
+            raise HTTPError(503, "Server busy, try again later")
+        finally:
+            self.metrics.queued -= 1
+
+        self.metrics.in_flight += 1
+        try:
+            yield
+        finally:
+            self.metrics.in_flight -= 1
+            self._slots.release()
+
+    async def handle(self, scope, receive, send) -> None:
+        path, method = scope["path"], scope["method"]
+        endpoint = path if path in ENDPOINTS else "other"
+        start = time.perf_counter()
+        response = {"status": 500, "started": False}
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["started"] = True
+            await send(message)
+
+        try:
+            if endpoint == "other":
+                raise HTTPError(404, "Not found")
+            if method != ENDPOINTS[path]:
+                raise HTTPError(405, f"Use {ENDPOINTS[path]} for {path}")
+            await self.startup()
+
+            if path == "/health":
+                await send_json(tracked_send, 200, {"status": "ok"})
+            elif path == "/metrics":
+                await send_body(tracked_send, 200, self.metrics.render(self.cache).encode("utf-8"),
+                                b"text/plain; version=0.0.4")
+            elif path == "/retrieve":
+                await self.handle_retrieve(await read_json(receive), tracked_send)
+            else:
+                await self.handle_query(scope, receive, await read_json(receive), tracked_send)
+        except HTTPError as e:
+            if not response["started"]:
+                await send_json(tracked_send, e.status, {"error": e.message})
+        except Exception as e:
+            if not response["started"]:
+                await send_json(tracked_send, 500, {"error": str(e)})
+        finally:
+            self.metrics.observe(endpoint, response["status"], time.perf_counter() - start)
+
+    async def handle_retrieve(self, body: dict, send) -> None:
+        top_k = int_field(body, "top_k", TOP_K, minimum=1)
+        mode = choice_field(body, "mode", RETRIEVAL_MODE, RETRIEVAL_MODES)
+
+        if "queries" in body:
+            queries = queries_field(body)
+            async with self.slot():
+                results = await asyncio.to_thread(retrieve_many, queries, top_k, self.persist_dir, VECTOR_BACKEND,
+                                                  mode)
+            await send_json(send, 200, {"results": results})
+            return
+
+        query = query_field(body)
+        async with self.slot():
+            results = await asyncio.to_thread(retrieve, query, top_k, self.persist_dir, VECTOR_BACKEND, mode)
+        await send_json(send, 200, {"results": results})
+
+    async def handle_query(self, scope, receive, body: dict, send) -> None:
+        query = query_field(body)
+        provider = choice_field(body, "provider", self.provider, list(PROVIDERS))
+        top_k = int_field(body, "top_k", TOP_K, minimum=1)
+        context_tokens = int_field(body, "context_tokens", CONTEXT_TOKEN_BUDGET)
+        accept = dict(scope.get("headers", [])).get(b"accept", b"")
+        stream = bool(body.get("stream")) or b"text/event-stream" in accept
+
+        with span("server.query", provider=provider, top_k=top_k, stream=stream) as current:
+            async with self.slot():
+                stats = {}
+                system, user_message, key, packed = await asyncio.to_thread(
+                    prepare_query, query, self.system_prompt, provider, top_k, context_tokens, stats,
+                    self.persist_dir)
+                sources = [source_summary(result) for result in packed]
+                cached = await asyncio.to_thread(self.cache.get, key) if self.cache is not None else None
+                stats["cached"] = cached is not None
+                current.set(cache_hit=stats["cached"])
+
+                if stream:
+                    await self.stream_answer(receive, send, provider, system, user_message, key, cached, sources,
+                                             stats)
+                    return
+
+                if cached is None:
+                    with span("llm.complete", provider=provider):
+                        response = await get_provider(provider).acomplete(system, user_message)
+                    if self.cache is not None:
+                        await asyncio.to_thread(self.cache.set, key, response)
+                else:
+                    response = cached
+        await send_json(send, 200, {"response": response, "sources": sources, "stats": stats})
+
+    async def stream_answer(self, receive, send, provider: str, system: str, user_message: str, key: str,
+                            cached: str | None, sources: list[dict], stats: dict) -> None:
+        """Send the answer as server-sent events, stopping early if the client goes away."""
+        task = asyncio.current_task()
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            task.cancel()
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no")],
+        })
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await send_event(send, "context", {"sources": sources, "stats": stats})
+            chunks = single_chunk(cached) if cached is not None else \
+                get_provider(provider).astream(system, user_message, stats)
+            parts = []
+            try:
+                async for chunk in atimed_stream(chunks, stats):
+                    parts.append(chunk)
+                    await send_event(send, "token", {"text": chunk})
+            except Exception as e:
+                await send_event(send, "error", {"error": str(e)})
+            else:
+                if cached is None and self.cache is not None:
+                    await asyncio.to_thread(self.cache.set, key, "".join(parts))
+                if stats.get("ttft") is not None:
+                    self.metrics.observe_ttft(stats["ttft"])
+                await send_event(send, "done", {"stats": stats})
+            await send({"type": "http.response.body", "body": b""})
+        except asyncio.CancelledError:
+            if not disconnected.is_set():
+                raise
+            task.uncancel()
+            self.metrics.disconnects += 1
+        finally:
+            watcher.cancel()
+
+
+app = RAGServer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the RAG pipeline over HTTP")
+    parser.add_argument("--host", default=SERVER_HOST, help=f"Bind address (default: {SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"Port (default: {SERVER_PORT})")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default=SERVER_PROVIDER,
+                        help="Default LLM provider for /query (stub answers offline, for testing)")
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_MAX_CONCURRENCY,
+                        help="Requests processed at once; others wait for a slot")
+    parser.add_argument("--queue-timeout", type=float, default=SERVER_QUEUE_TIMEOUT,
+                        help="Seconds a request may wait for a slot before a 503")
+    parser.add_argument("--cache-backend", choices=["memory", "sqlite", "none"], default=RESPONSE_CACHE_BACKEND,
+                        help="Response cache backend")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required to run the server: pip install uvicorn", file=sys.stderr)
+        sys.exit(1)
+
+    server = RAGServer(args.provider, args.max_concurrency, args.queue_timeout, args.cache_backend)
+    uvicorn.run(server, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Helpers for streaming LLM output: timing and incremental Rich rendering.
+
+Rich's markdown renderer pulls in a syntax highlighter and is slow to import,
+so it is only loaded once a response is actually rendered.
+"""
+
+import time
+
+from rich.console import Console
+
+
+def timed_stream(chunks, stats: dict):
+    """Pass text chunks through while recording timing in `stats`.
+
+    Fills ``ttft`` (seconds to first chunk), ``duration``, ``output_tokens`` and
+    ``tokens_per_sec``. If the producer already put a provider-reported
+    ``output_tokens`` into stats it is kept; otherwise chunks are counted.
+    """
+    start = time.perf_counter()
+    stats.setdefault("ttft", None)
+    n_chunks = 0
+    for chunk in chunks:
+        if stats["ttft"] is None:
+            stats["ttft"] = time.perf_counter() - start
+        n_chunks += 1
+        yield chunk
+
+    _finish_stats(stats, start, n_chunks)
+
+
+async def atimed_stream(chunks, stats: dict):
+    """Async variant of timed_stream for async iterables of text chunks."""
+    start = time.perf_counter()
+    stats.setdefault("ttft", None)
+    n_chunks = 0
+    async for chunk in chunks:
+        if stats["ttft"] is None:
+            stats["ttft"] = time.perf_counter() - start
+        n_chunks += 1
+        yield chunk
+
+    _finish_stats(stats, start, n_chunks)
+
+
+def _finish_stats(stats: dict, start: float, n_chunks: int) -> None:
+    stats["duration"] = time.perf_counter() - start
+    stats.setdefault("output_tokens", n_chunks)
+    generation_time = stats["duration"] - (stats["ttft"] or 0)
+    stats["tokens_per_sec"] = stats["output_tokens"] / generation_time if generation_time > 0 else 0.0
+
+
+def render_stream(console: Console, chunks, title: str = "Governance AI") -> str:
+    """Render streamed markdown in a live-updating panel and return the full text."""
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+
+    text = ""
+    with Live(Panel(Markdown(text), title=title, border_style="green"), console=console,
+              refresh_per_second=10, vertical_overflow="visible") as live:
+        for chunk in chunks:
+            text += chunk
+            live.update(Panel(Markdown(text), title=title, border_style="green"))
+    return text
+
+
+def print_response(console: Console, text: str, title: str = "Governance AI") -> None:
+    """Render a complete markdown response in a panel."""
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+
+    console.print(Panel(Markdown(text), title=title, border_style="green"))
+
+
+def format_stream_stats(stats: dict) -> str:
+    """One-line summary of time-to-first-token and throughput."""
+    if stats.get("cached"):
+        return "served from cache"
+    ttft = stats.get("ttft") or 0.0
+    return (f"TTFT {ttft:.2f}s · {stats.get('output_tokens', 0)} tokens in {stats.get('duration', 0):.1f}s "
+            f"· {stats.get('tokens_per_sec', 0):.1f} tok/s")
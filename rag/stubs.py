@@ -0,0 +1,78 @@
+"""Offline stand-ins for the embedding model and the LLM.
+
+StubEmbeddings derives a deterministic unit vector from each text's hash, and
+the stub provider answers by echoing the question. Together they let
+ingestion, retrieval, the pipeline and the server run without network access
+or API keys, e.g. for load tests and local development.
+"""
+
+import asyncio
+import hashlib
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import STUB_LLM_LATENCY
+
+STUB_MODEL = "stub"
+STUB_EMBEDDING_DIM = 256
+
+
+class StubEmbeddings(Embeddings):
+    """Deterministic pseudo-random embeddings seeded by a hash of the text."""
+
+    def __init__(self, dim: int = STUB_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def stub_response(user_message: str) -> str:
+    """Deterministic answer that echoes the question and the size of its context."""
+    context, _, question = user_message.rpartition("</paper_excerpts>")
+    question = question.strip() or user_message.strip()
+    sources = context.count("--- Source ")
+    return (f"Stub response to: {question}\n\n"
+            f"This answer was generated offline from {sources} retrieved excerpts. "
+            "Love, understood as decentralized coordination toward mutual flourishing, "
+            "is the strategy the paper argues for.")
+
+
+def query_stub(system: str, user_message: str) -> str:
+    """Answer like a provider query function, after STUB_LLM_LATENCY seconds."""
+    time.sleep(STUB_LLM_LATENCY)
+    return stub_response(user_message)
+
+
+def stream_stub(system: str, user_message: str, stats: dict):
+    """Stream the stub answer word by word, like a provider stream function."""
+    time.sleep(STUB_LLM_LATENCY)
+    words = stub_response(user_message).split(" ")
+    for i, word in enumerate(words):
+        yield word if i == 0 else " " + word
+    stats["output_tokens"] = len(words)
+
+
+async def aquery_stub(system: str, user_message: str) -> str:
+    """Async variant of query_stub."""
+    await asyncio.sleep(STUB_LLM_LATENCY)
+    return stub_response(user_message)
+
+
+async def astream_stub(system: str, user_message: str, stats: dict):
+    """Async variant of stream_stub."""
+    await asyncio.sleep(STUB_LLM_LATENCY)
+    words = stub_response(user_message).split(" ")
+    for i, word in enumerate(words):
+        yield word if i == 0 else " " + word
+    stats["output_tokens"] = len(words)
@@ -0,0 +1,24 @@
+"""Token counting shared by context packing and chat history management."""
+
+from functools import lru_cache
+
+TOKEN_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Load the tiktoken encoding, or None if it is unavailable (e.g. offline)."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text, falling back to ~4 characters per token without tiktoken."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,316 @@
+"""Structured tracing: nested, timed spans with attributes.
+
+Code marks stages with ``with span("retrieve", top_k=5):`` or the @traced
+decorator. A span's parent is whichever span is current in the calling context
+(contextvars), so nesting follows the call stack, including across asyncio
+tasks. Work handed to a thread pool joins the trace when it is submitted
+through contextvars.copy_context().run.
+
+Finished spans go to exporters:
+    JSONLExporter     one JSON object per span
+    OTLPJSONExporter  OpenTelemetry OTLP/JSON (ExportTraceServiceRequest per
+                      line), readable by the OpenTelemetry Collector's file
+                      receiver and most trace viewers
+    StageProfile      in-memory per-stage timings for --profile
+
+With no exporter registered, span() is a no-op. Set TRACE_EXPORT to "jsonl"
+or "otlp" to write every trace to TRACE_PATH.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import TRACE_EXPORT, TRACE_PATH
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+SERVICE_NAME = "governance-ai"
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error",
+                 "_start_perf")
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._start_perf = time.perf_counter_ns()
+
+    def set(self, **attributes) -> None:
+        """Add or overwrite attributes."""
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        # Wall-clock start plus monotonic duration, so clock adjustments don't skew durations
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_perf
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when tracing is off; attributes are discarded."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JSONLExporter:
+    """Append each finished span to a JSONL file."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPJSONExporter:
+    """Write spans in OpenTelemetry's OTLP/JSON encoding.
+
+    Spans are buffered and written as one ExportTraceServiceRequest per line
+    whenever a root span finishes or the buffer fills.
+    """
+
+    MAX_BUFFER = 512
+
+    def __init__(self, path: Path, service_name: str = SERVICE_NAME):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        with self._lock:
+            self._buffer.append(otlp_span)
+            if span.parent_id is None or len(self._buffer) >= self.MAX_BUFFER:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        request = {"resourceSpans": [{
+            "resource": self._resource,
+            "scopeSpans": [{"scope": {"name": "governance-ai.rag"}, "spans": self._buffer}],
+        }]}
+        self._file.write(json.dumps(request, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._buffer = []
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+        self._file.close()
+
+
+class StageProfile:
+    """Collect span timings for --profile reports.
+
+    Keeps the spans of the most recent finished trace and running latency
+    samples per span name.
+    """
+
+    def __init__(self):
+        self.last_trace = []
+        self.samples = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.samples.setdefault(span.name, []).append(span.duration_ms)
+            self._pending.setdefault(span.trace_id, []).append(span)
+            if span.parent_id is None:
+                self.last_trace = self._pending.pop(span.trace_id)
+
+    def close(self) -> None:
+        pass
+
+    def trace_table(self, title: str = "Latency Breakdown") -> "Table":
+        """Table of the last trace's spans, nested under their parents."""
+        from rich.table import Table
+
+        children = {}
+        for span in self.last_trace:
+            children.setdefault(span.parent_id, []).append(span)
+        root = next((span for span in self.last_trace if span.parent_id is None), None)
+        total = root.duration_ms if root else 0.0
+
+        table = Table(title=title)
+        table.add_column("Stage")
+        table.add_column("ms", justify="right")
+        table.add_column("%", justify="right")
+        table.add_column("Attributes", style="dim")
+
+        def add(span: Span, depth: int) -> None:
+            share = 100 * span.duration_ms / total if total else 0.0
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            name = "  " * depth + span.name + (" [red](error)[/red]" if span.error else "")
+            table.add_row(name, f"{span.duration_ms:.1f}", f"{share:.0f}", attributes)
+            for child in sorted(children.get(span.span_id, []), key=lambda s: s.start_ns):
+                add(child, depth + 1)
+
+        if root:
+            add(root, 0)
+        return table
+
+    def summary_table(self, title: str = "Stage Latency") -> "Table":
+        """Count, total and percentiles per span name over the whole run."""
+        import numpy as np
+        from rich.table import Table
+
+        table = Table(title=title)
+        table.add_column("Stage")
+        table.add_column("Count", justify="right")
+        table.add_column("Total s", justify="right")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self.samples.items()}
+        for name, values in sorted(samples.items(), key=lambda item: -item[1].sum()):
+            table.add_row(name, str(len(values)), f"{values.sum() / 1000:.2f}",
+                          f"{np.percentile(values, 50):.1f}", f"{np.percentile(values, 95):.1f}")
+        return table
+
+
+class Tracer:
+    """Creates spans, tracks the current one, and hands finished spans to exporters."""
+
+    def __init__(self):
+        self.exporters = []
+        self._current = contextvars.ContextVar("current_span", default=None)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+        return exporter
+
+    def current_span(self):
+        """The innermost open span in this context, or a no-op span."""
+        return self._current.get() or NOOP_SPAN
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the enclosed block as a child of the current span."""
+        if not self.exporters:
+            yield NOOP_SPAN
+            return
+
+        span = Span(name, self._current.get(), attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                self._current.reset(token)
+            except ValueError:
+                pass  # A generator closed from another context; its context is already gone
+            span.finish()
+            for exporter in self.exporters:
+                exporter.export(span)
+
+    def traced(self, name: str | None = None):
+        """Decorator that runs a function inside a span named after it."""
+        def decorator(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+
+EXPORTERS = {
+    "jsonl": JSONLExporter,
+    "otlp": OTLPJSONExporter,
+}
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+current_span = tracer.current_span
+
+if TRACE_EXPORT:
+    if TRACE_EXPORT not in EXPORTERS:
+        raise ValueError(f"Unknown TRACE_EXPORT: {TRACE_EXPORT} (expected one of {', '.join(EXPORTERS)})")
+    tracer.add_exporter(EXPORTERS[TRACE_EXPORT](TRACE_PATH))
+atexit.register(tracer.close)
+
+
+def enable_profiling() -> StageProfile:
+    """Register and return an in-memory profile collector."""
+    return tracer.add_exporter(StageProfile())
@@ -0,0 +1,238 @@
+"""Built-in vector index: a memory-mapped float32 matrix searched with NumPy.
+
+For a corpus the size of the paper, exact search is a single matrix-vector
+product over L2-normalized embeddings followed by ``argpartition`` for the top
+k, which is faster to open and query than a Chroma collection. For larger
+corpora the index can also be built with an inverted-file (IVF) layout: rows
+are clustered with spherical k-means and a query only scans the rows of its
+``nprobe`` closest clusters.
+
+On-disk layout (inside ``<persist_dir>/vector_index``):
+
+- ``index.json``: dimensions, row count, embedding model and IVF settings
+- ``embeddings.f32``: row-major float32 matrix of normalized embeddings
+- ``chunks.jsonl``: one ``{"id", "content", "metadata"}`` record per row
+- ``centroids.f32`` / ``lists.i32`` / ``offsets.i64``: IVF clusters (optional)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, VECTOR_INDEX_NPROBE
+from tracing import span
+
+INDEX_DIRNAME = "vector_index"
+# Max elements in one block of query-by-row scores during bulk exact search (64 MB of float32)
+SEARCH_BLOCK_ELEMENTS = 2 ** 24
+
+
+def index_dir(persist_dir: Path) -> Path:
+    """Directory holding the NumPy index inside a vector store directory."""
+    return Path(persist_dir) / INDEX_DIRNAME
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Cluster normalized vectors by cosine similarity, returning unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assignments == c]
+            # Re-seed empty clusters with a random point
+            centroids[c] = members.sum(axis=0) if len(members) else vectors[rng.integers(len(vectors))]
+        centroids = normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+class IndexWriter:
+    """Write a NumPy index one batch of rows at a time.
+
+    Rows are appended to the matrix and chunk files as they arrive, so only
+    the current batch is held in memory. close() builds the IVF clusters, if
+    any, from the memory-mapped matrix and writes ``index.json``.
+    """
+
+    def __init__(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.count = 0
+        self.dim = 0
+        self._matrix = open(path / "embeddings.f32", "wb")
+        self._chunks = open(path / "chunks.jsonl", "w", encoding="utf-8")
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict], vectors: list[list[float]]) -> None:
+        if not vectors:
+            return
+        matrix = normalize(np.asarray(vectors, dtype=np.float32)).astype(np.float32)
+        self.dim = matrix.shape[1]
+        matrix.tofile(self._matrix)
+        for cid, text, metadata in zip(ids, texts, metadatas):
+            self._chunks.write(json.dumps({"id": cid, "content": text, "metadata": metadata},
+                                          ensure_ascii=False) + "\n")
+        self.count += len(matrix)
+
+    def close(self, n_lists: int = 0) -> None:
+        """Finish the index; with n_lists > 0 also build IVF clusters."""
+        self._matrix.close()
+        self._chunks.close()
+
+        n_lists = min(n_lists, self.count)
+        if n_lists > 0:
+            matrix = np.memmap(self.path / "embeddings.f32", dtype=np.float32, mode="r",
+                               shape=(self.count, self.dim))
+            centroids = spherical_kmeans(matrix, n_lists)
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable").astype(np.int32)
+            offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1)).astype(np.int64)
+            centroids.tofile(self.path / "centroids.f32")
+            order.tofile(self.path / "lists.i32")
+            offsets.tofile(self.path / "offsets.i64")
+
+        with open(self.path / "index.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "count": int(self.count),
+                "dim": int(self.dim),
+                "embedding_model": EMBEDDING_MODEL,
+                "n_lists": int(n_lists),
+            }, f, indent=2)
+
+
+def write_index(path: Path, ids: list[str], texts: list[str], metadatas: list[dict],
+                vectors: list[list[float]], n_lists: int = 0) -> None:
+    """Write a NumPy index in one go; with n_lists > 0 also build IVF clusters."""
+    writer = IndexWriter(path)
+    writer.add(ids, texts, metadatas, vectors)
+    writer.close(n_lists)
+
+
+class VectorIndex:
+    """Read-only view of an index written by write_index."""
+
+    def __init__(self, path: Path, embedding_function):
+        with open(path / "index.json", "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.path = path
+        self.embedding_function = embedding_function
+        self.count = self.info["count"]
+        self.dim = self.info["dim"]
+
+        if self.count:
+            self.matrix = np.memmap(path / "embeddings.f32", dtype=np.float32, mode="r",
+                                    shape=(self.count, self.dim))
+        else:
+            self.matrix = np.empty((0, self.dim), dtype=np.float32)
+
+        self.n_lists = self.info.get("n_lists", 0)
+        if self.n_lists:
+            self.centroids = np.fromfile(path / "centroids.f32", dtype=np.float32).reshape(self.n_lists, self.dim)
+            self.lists = np.fromfile(path / "lists.i32", dtype=np.int32)
+            self.offsets = np.fromfile(path / "offsets.i64", dtype=np.int64)
+
+        with open(path / "chunks.jsonl", "r", encoding="utf-8") as f:
+            self.chunks = [json.loads(line) for line in f]
+
+    def candidates(self, vector: np.ndarray, nprobe: int) -> np.ndarray | None:
+        """Row ids in the nprobe clusters nearest the query, or None for exact search."""
+        if not self.n_lists or nprobe >= self.n_lists:
+            return None
+        nearest = top_k(self.centroids @ vector, nprobe)
+        return np.concatenate([self.lists[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+
+    def search_by_vector(self, vector: list[float], k: int, nprobe: int = VECTOR_INDEX_NPROBE) -> list[dict]:
+        """Return the k nearest chunks to an embedding, as retrieve() result dicts."""
+        if not self.count:
+            return []
+        query = normalize(np.asarray(vector, dtype=np.float32))
+        rows = self.candidates(query, nprobe)
+
+        if rows is None:
+            scores = self.matrix @ query
+            best = top_k(scores, k)
+            return self.results(best, scores[best])
+
+        scores = self.matrix[rows] @ query
+        best = top_k(scores, k)
+        return self.results(rows[best], scores[best])
+
+    def search_by_vectors(self, vectors: list[list[float]], k: int,
+                          nprobe: int = VECTOR_INDEX_NPROBE) -> list[list[dict]]:
+        """Return the k nearest chunks to each of many embeddings.
+
+        Exact search scores a block of queries against every row with one
+        matrix product; IVF search picks the clusters for all queries with one
+        product against the centroids, then scans each query's clusters.
+        """
+        if not self.count or not len(vectors):
+            return [[] for _ in vectors]
+        queries = normalize(np.asarray(vectors, dtype=np.float32))
+
+        if not self.n_lists or nprobe >= self.n_lists:
+            results = []
+            block = max(SEARCH_BLOCK_ELEMENTS // self.count, 1)
+            for start in range(0, len(queries), block):
+                scores = queries[start:start + block] @ self.matrix.T
+                best = top_k_rows(scores, k)
+                results.extend(self.results(rows, row_scores[rows]) for rows, row_scores in zip(best, scores))
+            return results
+
+        results = []
+        for query, clusters in zip(queries, top_k_rows(queries @ self.centroids.T, nprobe)):
+            rows = np.concatenate([self.lists[self.offsets[c]:self.offsets[c + 1]] for c in clusters])
+            scores = self.matrix[rows] @ query
+            best = top_k(scores, k)
+            results.append(self.results(rows[best], scores[best]))
+        return results
+
+    def results(self, rows: np.ndarray, scores: np.ndarray) -> list[dict]:
+        """retrieve() result dicts for matrix rows and their scores."""
+        return [
+            {
+                "content": self.chunks[row]["content"],
+                "metadata": self.chunks[row]["metadata"],
+                "score": float(score),
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    def search(self, query: str, k: int, nprobe: int = VECTOR_INDEX_NPROBE) -> list[dict]:
+        """Embed a query and return its k nearest chunks."""
+        with span("embed_query"):
+            vector = self.embedding_function.embed_query(query)
+        with span("vector_search", k=k, rows=self.count):
+            return self.search_by_vector(vector, k, nprobe)
+
+    def search_many(self, queries: list[str], k: int, nprobe: int = VECTOR_INDEX_NPROBE) -> list[list[dict]]:
+        """Embed many queries in batched requests and return each one's k nearest chunks."""
+        with span("embed_queries", queries=len(queries)):
+            vectors = self.embedding_function.embed_documents(queries)
+        with span("vector_search", k=k, rows=self.count, queries=len(queries)):
+            return self.search_by_vectors(vectors, k, nprobe)